@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class Notification(BaseModel):
+    notification_id: int
+    action_id: int
+    blink_url: str
+    sent: bool
+    timestamp: str
+    user_id: str = Field(..., description="wallet_public_key of the notified user")
+    expires_at: Optional[int] = Field(
+        None, description="Epoch seconds after which a sent notification expires"
+    )
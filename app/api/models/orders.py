@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from decimal import Decimal
+from pydantic import BaseModel, Field
 from typing import Dict, Optional
 
 
@@ -13,3 +14,20 @@ class Order(BaseModel):
     action_event: ActionEvent
     user_id: str
     timestamp: Optional[int] = None
+
+
+class CurrencyStats(BaseModel):
+    count: int
+    # Exact sum, serialized as a string so no precision is lost
+    amount: Decimal
+
+
+class OrderStats(BaseModel):
+    user_id: str
+    currencies: Dict[str, CurrencyStats] = Field(
+        ..., description="Orders created by this user, per currency"
+    )
+    received: Dict[str, CurrencyStats] = Field(
+        default_factory=dict,
+        description="Orders requested from this user's Telegram username, per currency",
+    )
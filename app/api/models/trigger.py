@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -9,3 +9,17 @@ class EventTrigger(BaseModel):
     description: Optional[str] = Field(
         None, description="Description of the event trigger"
     )
+
+
+class TriggerEvent(BaseModel):
+    event_type: str = Field(..., description="Type of the incoming event")
+
+
+class TriggerMatchRequest(BaseModel):
+    events: List[TriggerEvent] = Field(..., description="Events to match")
+
+
+class TriggerMatchResponse(BaseModel):
+    matches: List[List[int]] = Field(
+        ..., description="Matching trigger IDs for each event, in request order"
+    )
@@ -1,24 +1,42 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import boto3
 from botocore.exceptions import ClientError
 from typing import List, Dict, Optional
 from app.api.models.action_types import ActionType
+from app.core.db import get_table
+from app.core.payloads import encode_payload, decode_payload
+from app.core.projection import (
+    FIELDS_QUERY,
+    parse_fields,
+    projection_kwargs,
+    fields_response,
+)
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource("dynamodb", region_name="eu-central-1")
-actions_table = dynamodb.Table("action_types")
+# DynamoDB tables, built on first use
+actions_table = get_table("action_types")
 
 # Initialize the router
 router = APIRouter()
 
 
+def decode_action_type(item: Dict) -> Dict:
+    if item.get("json") is not None:
+        item["json"] = decode_payload(item["json"])
+    return item
+
+
+def to_action_type(item: Dict) -> ActionType:
+    return ActionType(**decode_action_type(item))
+
+
 # Create a new ActionType
 @router.post("/", response_model=ActionType)
-async def create_action_type(action_type: ActionType):
+def create_action_type(action_type: ActionType):
     try:
+        item = action_type.dict()
+        item["json"] = encode_payload(action_type.json)
         actions_table.put_item(
-            Item=action_type.dict(), ConditionExpression="attribute_not_exists(type_id)"
+            Item=item, ConditionExpression="attribute_not_exists(type_id)"
         )
         return action_type
     except ClientError as e:
@@ -33,12 +51,19 @@ async def create_action_type(action_type: ActionType):
 
 # Get an ActionType by type_id
 @router.get("/{type_id}", response_model=ActionType)
-async def get_action_type(type_id: int):
+def get_action_type(type_id: int, fields: Optional[str] = FIELDS_QUERY):
+    names = parse_fields(fields, ActionType)
     try:
-        response = actions_table.get_item(Key={"type_id": type_id})
+        response = actions_table.get_item(
+            Key={"type_id": type_id}, **projection_kwargs(names, keys=["type_id"])
+        )
         if "Item" not in response:
             raise HTTPException(status_code=404, detail="ActionType not found")
-        return ActionType(**response["Item"])
+        if names:
+            return fields_response(
+                ActionType, names, decode_action_type(response["Item"])
+            )
+        return to_action_type(response["Item"])
     except ClientError:
         raise HTTPException(
             status_code=500, detail="An error occurred while retrieving the ActionType"
@@ -47,7 +72,7 @@ async def get_action_type(type_id: int):
 
 # Update an existing ActionType
 @router.put("/{type_id}", response_model=ActionType)
-async def update_action_type(type_id: int, action_type: ActionType):
+def update_action_type(type_id: int, action_type: ActionType):
     if type_id != action_type.type_id:
         raise HTTPException(
             status_code=400, detail="Path type_id does not match body type_id"
@@ -60,11 +85,11 @@ async def update_action_type(type_id: int, action_type: ActionType):
                 ":bn": action_type.business_name,
                 ":cn": action_type.contract_name,
                 ":d": action_type.description,
-                ":j": action_type.json,
+                ":j": encode_payload(action_type.json),
             },
             ReturnValues="ALL_NEW",
         )
-        return ActionType(**response["Attributes"])
+        return to_action_type(response["Attributes"])
     except ClientError:
         raise HTTPException(
             status_code=500, detail="An error occurred while updating the ActionType"
@@ -73,7 +98,7 @@ async def update_action_type(type_id: int, action_type: ActionType):
 
 # Delete an ActionType
 @router.delete("/{type_id}", response_model=Dict[str, str])
-async def delete_action_type(type_id: int):
+def delete_action_type(type_id: int):
     try:
         actions_table.delete_item(Key={"type_id": type_id})
         return {"message": f"ActionType with type_id {type_id} has been deleted"}
@@ -85,10 +110,14 @@ async def delete_action_type(type_id: int):
 
 # List all ActionTypes
 @router.get("/", response_model=List[ActionType])
-async def list_action_types():
+def list_action_types(fields: Optional[str] = FIELDS_QUERY):
+    names = parse_fields(fields, ActionType)
     try:
-        response = actions_table.scan()
-        return [ActionType(**item) for item in response["Items"]]
+        response = actions_table.scan(**projection_kwargs(names))
+        if names:
+            items = [decode_action_type(item) for item in response["Items"]]
+            return fields_response(ActionType, names, items)
+        return [to_action_type(item) for item in response["Items"]]
     except ClientError:
         raise HTTPException(
             status_code=500, detail="An error occurred while retrieving ActionTypes"
@@ -1,16 +1,33 @@
-from fastapi import APIRouter, HTTPException, Query
-import boto3
+from fastapi import APIRouter, HTTPException, Query, Header, Depends, Response
 from botocore.exceptions import ClientError
 from typing import List, Dict, Optional
 from app.api.models.actions import Action
-
-dynamodb = boto3.resource("dynamodb", region_name="eu-central-1")
-actions_table = dynamodb.Table("actions")
-users_table = dynamodb.Table("users")
+from app.core.idempotency import run_idempotent
+from app.core.admission import AdmissionController
+from app.core.db import get_table, transact_write, cancellation_reasons
+from app.core.payloads import (
+    encode_payload,
+    decode_payload,
+    is_encoded,
+    payload_json_bytes,
+)
+from app.core.projection import (
+    FIELDS_QUERY,
+    parse_fields,
+    projection_kwargs,
+    fields_response,
+)
+
+# DynamoDB tables, built on first use
+actions_table = get_table("actions")
+users_table = get_table("users")
 
 # Initialize the router
 router = APIRouter()
 
+# Per-wallet rate limit and concurrency cap for action creation
+action_admission = AdmissionController("actions")
+
 # Function to check if the user exists (simulated foreign key enforcement)
 
 
@@ -28,17 +45,21 @@ def check_user_exists(wallet_public_key: str):
 
 # General GET endpoint to retrieve all actions
 @router.get("/", response_model=List[Action])
-async def list_actions(
+def list_actions(
     filter_key: Optional[str] = Query(None, description="Attribute to filter on"),
     filter_value: Optional[str] = Query(None, description="Value to filter by"),
     limit: Optional[int] = Query(None, description="Number of items to return"),
     last_evaluated_key: Optional[str] = Query(
         None, description="Last evaluated key for pagination"
     ),
+    fields: Optional[str] = FIELDS_QUERY,
 ):
+    names = parse_fields(fields, Action)
     try:
-        scan_kwargs = {}
+        scan_kwargs = projection_kwargs(names)
         if filter_key and filter_value:
+            from boto3.dynamodb.conditions import Attr
+
             scan_kwargs["FilterExpression"] = Attr(filter_key).eq(filter_value)
         if limit:
             scan_kwargs["Limit"] = limit
@@ -49,6 +70,12 @@ async def list_actions(
 
         items = response.get("Items", [])
 
+        if names:
+            for item in items:
+                if "payload" in item:
+                    item["payload"] = decode_payload(item["payload"])
+            return fields_response(Action, names, items)
+
         # Transform items to match the Action model
         transformed_items = []
         for item in items:
@@ -58,7 +85,7 @@ async def list_actions(
                 "user_id": item["user_id"],
                 "transaction_index": item.get("transaction_index"),
                 "transaction_type": item.get("transaction_type"),
-                "payload": item["payload"],
+                "payload": decode_payload(item["payload"]),
             }
             transformed_items.append(Action(**transformed_item))
 
@@ -69,22 +96,56 @@ async def list_actions(
 
 
 # POST endpoint to add a new action with foreign key enforcement
-@router.post("/", response_model=Action)
-async def create_action(action: Action):
-    # Simulate foreign key enforcement
-    check_user_exists(
-        action.user_id
-    )  # user_id in action is actually the wallet_public_key
+@router.post("/", response_model=Action, dependencies=[Depends(action_admission)])
+def create_action(
+    action: Action,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    # Retries carrying the same Idempotency-Key replay the first response
+    return run_idempotent(
+        "actions", idempotency_key, action, lambda: _create_action(action)
+    )
+
+
+def _create_action(action: Action):
+    item = action.dict()
+    item["payload"] = encode_payload(action.payload)
+    # The put and the user check (foreign key enforcement) run as one
+    # transaction, so the user can't be deleted in between
     try:
-        actions_table.put_item(
-            Item=action.dict(), ConditionExpression="attribute_not_exists(action_id)"
+        transact_write(
+            "actions",
+            [
+                {
+                    "Put": {
+                        "TableName": "actions",
+                        "Item": item,
+                        "ConditionExpression": "attribute_not_exists(action_id)",
+                    }
+                },
+                {
+                    "ConditionCheck": {
+                        "TableName": "users",
+                        # user_id in action is actually the wallet_public_key
+                        "Key": {"wallet_public_key": action.user_id},
+                        "ConditionExpression": "attribute_exists(wallet_public_key)",
+                    }
+                },
+            ],
         )
         return action
     except ClientError as e:
-        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-            raise HTTPException(
-                status_code=400, detail="Action with this action_id already exists"
-            )
+        if e.response["Error"]["Code"] == "TransactionCanceledException":
+            reasons = cancellation_reasons(e)
+            if reasons[0:1] == ["ConditionalCheckFailed"]:
+                raise HTTPException(
+                    status_code=400, detail="Action with this action_id already exists"
+                )
+            if reasons[1:2] == ["ConditionalCheckFailed"]:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"User with wallet_public_key {action.user_id} does not exist",
+                )
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -92,15 +153,24 @@ async def create_action(action: Action):
 
 
 @router.get("/{action_id}", response_model=Dict)
-async def get_action_payload(action_id: int):
+def get_action_payload(action_id: int):
     try:
-        response = actions_table.get_item(Key={"action_id": action_id})
+        # Only the payload is returned, so don't read the rest of the item
+        response = actions_table.get_item(
+            Key={"action_id": action_id},
+            **projection_kwargs(["payload"], keys=["action_id"]),
+        )
         if "Item" not in response:
             raise HTTPException(status_code=404, detail="Action not found")
         action_item = response["Item"]
         payload = action_item.get("payload")
         if payload is None:
             raise HTTPException(status_code=404, detail="Payload not found")
+        if is_encoded(payload):
+            # Stored as JSON already; skip the parse/re-serialize round trip
+            return Response(
+                content=payload_json_bytes(payload), media_type="application/json"
+            )
         return payload
     except ClientError as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -108,7 +178,7 @@ async def get_action_payload(action_id: int):
 
 # PUT endpoint to update an existing action
 @router.put("/{action_id}", response_model=Action)
-async def update_action(action_id: int, action: Action):
+def update_action(action_id: int, action: Action):
     if action_id != action.action_id:
         raise HTTPException(
             status_code=400, detail="Path action_id does not match body action_id"
@@ -123,18 +193,20 @@ async def update_action(action_id: int, action: Action):
             ExpressionAttributeValues={
                 ":ati": action.action_type_id,
                 ":uid": action.user_id,
-                ":p": action.payload,
+                ":p": encode_payload(action.payload),
             },
             ReturnValues="ALL_NEW",
         )
-        return Action(**response["Attributes"])
+        attributes = response["Attributes"]
+        attributes["payload"] = decode_payload(attributes["payload"])
+        return Action(**attributes)
     except ClientError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # DELETE endpoint to remove an action
 @router.delete("/{action_id}", response_model=Dict[str, str])
-async def delete_action(action_id: int):
+def delete_action(action_id: int):
     try:
         actions_table.delete_item(Key={"action_id": action_id})
         return {"message": f"Action with action_id {action_id} has been deleted"}
@@ -1,74 +1,183 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import boto3
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
 from botocore.exceptions import ClientError
 from typing import List, Dict, Optional
+import base64
+import json
+import os
+import time
+from app.api.models.notifications import Notification
+from app.core.projection import (
+    FIELDS_QUERY,
+    parse_fields,
+    projection_kwargs,
+    fields_response,
+)
+from app.core.db import get_table, transact_write, cancellation_reasons
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name='eu-central-1')  # Replace with your AWS region
-notifications_table = dynamodb.Table('notifications')
-users_table = dynamodb.Table('users')  # Reference for foreign key enforcement on user_id
-actions_table = dynamodb.Table('actions')  # Reference for foreign key enforcement on action_id
+# DynamoDB tables, built on first use
+notifications_table = get_table('notifications')
+
+# Sent notifications expire (via DynamoDB TTL on expires_at) after this long; 0 keeps them
+NOTIFICATION_TTL_SECONDS = int(os.getenv("NOTIFICATION_TTL_SECONDS", str(30 * 24 * 3600)))
 
 # Initialize the router
 router = APIRouter()
 
-# Define the data model for Notifications using Pydantic
-class Notification(BaseModel):
-    notification_id: int
-    action_id: int
-    blink_url: str
-    sent: bool
-    timestamp: str
-    user_id: int
-
-# Function to check if the user exists (simulated foreign key enforcement)
-def check_user_exists(user_id: int):
+
+def encode_cursor(last_evaluated_key: Dict) -> str:
+    raw = json.dumps(jsonable_encoder(last_evaluated_key)).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+# Key attributes of a user_id-timestamp-index page boundary and their types
+CURSOR_FIELDS = {"notification_id": int, "user_id": str, "timestamp": str}
+
+
+def decode_cursor(cursor: str, user_id: str) -> Dict:
     try:
-        response = users_table.get_item(Key={"user_id": user_id})
-        if 'Item' not in response:
-            raise HTTPException(status_code=404, detail=f"User with user_id {user_id} does not exist")
-    except ClientError as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        key = None
+    if (
+        not isinstance(key, dict)
+        or set(key) != set(CURSOR_FIELDS)
+        # bool is an int subclass, so compare exact types
+        or any(type(key[name]) is not kind for name, kind in CURSOR_FIELDS.items())
+        or key["user_id"] != user_id
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def not_expired():
+    from boto3.dynamodb.conditions import Attr
 
-# Function to check if the action exists (simulated foreign key enforcement)
-def check_action_exists(action_id: int):
+    # TTL deletion can lag by up to a couple of days, so hide expired items
+    return Attr("expires_at").not_exists() | Attr("expires_at").gt(int(time.time()))
+
+
+# GET endpoint to retrieve notifications, per user when user_id is given
+@router.get("/", response_model=List[Dict])
+def list_notifications(
+    response: Response,
+    user_id: Optional[str] = Query(
+        None, description="Only this user's notifications, newest first"
+    ),
+    limit: int = Query(20, ge=1, le=100, description="Page size when user_id is given"),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header value from the previous page"
+    ),
+    fields: Optional[str] = FIELDS_QUERY,
+):
+    names = parse_fields(fields, Notification)
     try:
-        response = actions_table.get_item(Key={"action_id": action_id})
-        if 'Item' not in response:
-            raise HTTPException(status_code=404, detail=f"Action with action_id {action_id} does not exist")
+        if user_id is None:
+            result = notifications_table.scan(
+                FilterExpression=not_expired(), **projection_kwargs(names)
+            )
+        else:
+            from boto3.dynamodb.conditions import Key
+
+            query_kwargs = projection_kwargs(names)
+            if cursor:
+                query_kwargs["ExclusiveStartKey"] = decode_cursor(cursor, user_id)
+            # Limit caps the items read before the expiry filter, so a page may
+            # come back short or empty while X-Next-Cursor is still set
+            result = notifications_table.query(
+                IndexName="user_id-timestamp-index",
+                KeyConditionExpression=Key("user_id").eq(user_id),
+                FilterExpression=not_expired(),
+                ScanIndexForward=False,
+                Limit=limit,
+                **query_kwargs,
+            )
     except ClientError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# General GET endpoint to retrieve all notifications
-@router.get("/", response_model=List[Dict])
-def list_notifications():
+    items = result.get('Items', [])
+    if names:
+        # A returned response replaces the injected one, so set headers on it
+        response = fields_response(Notification, names, items)
+    if user_id is not None and "LastEvaluatedKey" in result:
+        response.headers["X-Next-Cursor"] = encode_cursor(result["LastEvaluatedKey"])
+    return response if names else items
+
+
+# PUT endpoint called once a notification has been dispatched
+@router.put("/{notification_id}/sent", response_model=Notification)
+def mark_notification_sent(notification_id: int):
+    update_expression = "SET sent = :sent"
+    values = {":sent": True}
+    if NOTIFICATION_TTL_SECONDS > 0:
+        update_expression += ", expires_at = :expires_at"
+        values[":expires_at"] = int(time.time()) + NOTIFICATION_TTL_SECONDS
     try:
-        response = notifications_table.scan()
-        items = response.get('Items')
-        return items
+        result = notifications_table.update_item(
+            Key={"notification_id": notification_id},
+            UpdateExpression=update_expression,
+            ConditionExpression="attribute_exists(notification_id)",
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW",
+        )
+        return Notification(**result["Attributes"])
     except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise HTTPException(
+                status_code=404,
+                detail=f"Notification with notification_id {notification_id} does not exist",
+            )
         raise HTTPException(status_code=500, detail=str(e))
 
+
 # POST endpoint to add a new notification with foreign key enforcement
 @router.post("/", response_model=Notification)
 def create_notification(notification: Notification):
-    # Simulate foreign key enforcement
-    check_user_exists(notification.user_id)
-    check_action_exists(notification.action_id)
+    item = notification.dict(exclude={"expires_at"})
+    if notification.sent and NOTIFICATION_TTL_SECONDS > 0:
+        notification.expires_at = int(time.time()) + NOTIFICATION_TTL_SECONDS
+        item["expires_at"] = notification.expires_at
 
+    # The referenced user and action are checked in the same transaction as
+    # the write, so neither can be deleted between the check and the put
     try:
-        # Prepare the item to insert into DynamoDB
-        notifications_table.put_item(
-            Item={
-                "notification_id": {"N": str(notification.notification_id)},
-                "action_id": {"N": str(notification.action_id)},
-                "blink_url": {"S": notification.blink_url},
-                "sent": {"BOOL": notification.sent},
-                "timestamp": {"S": notification.timestamp},
-                "user_id": {"N": str(notification.user_id)},
-            }
+        transact_write(
+            "notifications",
+            [
+                {
+                    "Put": {
+                        "TableName": "notifications",
+                        "Item": item,
+                    }
+                },
+                {
+                    "ConditionCheck": {
+                        "TableName": "users",
+                        "Key": {"wallet_public_key": notification.user_id},
+                        "ConditionExpression": "attribute_exists(wallet_public_key)",
+                    }
+                },
+                {
+                    "ConditionCheck": {
+                        "TableName": "actions",
+                        "Key": {"action_id": notification.action_id},
+                        "ConditionExpression": "attribute_exists(action_id)",
+                    }
+                },
+            ],
         )
         return notification
     except ClientError as e:
+        if e.response["Error"]["Code"] == "TransactionCanceledException":
+            reasons = cancellation_reasons(e)
+            if reasons[1:2] == ["ConditionalCheckFailed"]:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"User with wallet_public_key {notification.user_id} does not exist",
+                )
+            if reasons[2:3] == ["ConditionalCheckFailed"]:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Action with action_id {notification.action_id} does not exist",
+                )
         raise HTTPException(status_code=500, detail=str(e))
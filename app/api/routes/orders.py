@@ -1,21 +1,113 @@
-from fastapi import APIRouter, HTTPException
-import boto3
+from fastapi import APIRouter, HTTPException, Header, Query, Request, Depends
+from fastapi.responses import StreamingResponse
+import asyncio
 from botocore.exceptions import ClientError
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+from decimal import Decimal, InvalidOperation
+import logging
 import time
-from app.api.models.orders import Order
-from boto3.dynamodb.conditions import Key
+from app.api.models.orders import Order, OrderStats
+from app.core.idempotency import run_idempotent
+from app.core.pubsub import PubSubHub, LAGGED
+from app.core.admission import AdmissionController
+from app.core.projection import (
+    FIELDS_QUERY,
+    parse_fields,
+    projection_kwargs,
+    fields_response,
+)
+from app.core.db import get_table
+from app.core.resilience import DynamoDBUnavailable
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource("dynamodb", region_name="eu-central-1")
-orders_table = dynamodb.Table("orders")
-users_table = dynamodb.Table("users")
+logger = logging.getLogger(__name__)
+
+# DynamoDB tables, built on first use
+orders_table = get_table("orders")
+users_table = get_table("users")
+order_stats_table = get_table("order_stats")
 
 # Initialize the router
 router = APIRouter()
 
+# Per-wallet rate limit and concurrency cap for order creation
+order_admission = AdmissionController("orders")
+
+# Fan-out of newly created orders to /orders/stream subscribers
+order_hub = PubSubHub()
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT_SECONDS = 15
+
+
+def received_stats_key(telegram_username: str) -> str:
+    # Requestees are known by Telegram username, never by wallet
+    return f"telegram:{telegram_username}"
+
+
+def order_totals(item: Optional[Dict]) -> List[Tuple[str, str, Decimal]]:
+    """(stats key, currency, amount) for every stats item an order counts in.
+
+    That is the creator's item and, for requests, the requestee's
+    "received" item.
+    """
+    if not item:
+        return []
+    details = item.get("action_event", {}).get("details", {})
+    currency = details.get("currency") or item.get("app")
+    try:
+        amount = Decimal(str(details.get("amount", 0)))
+    except InvalidOperation:
+        amount = Decimal(0)
+    if not amount.is_finite():
+        amount = Decimal(0)
+    keys = [item["user_id"]]
+    requestee = details.get("telegram_username")
+    if requestee:
+        keys.append(received_stats_key(requestee))
+    return [(key, currency, amount) for key in keys]
+
+
+def update_order_stats(old_item: Optional[Dict], new_item: Optional[Dict]):
+    """Apply the difference between two versions of an order to the stats items.
+
+    Each affected item gets a single atomic ADD of the count and amount
+    deltas per currency, stored as ``count:<currency>``/``amount:<currency>``.
+    """
+    deltas: Dict[str, Dict[str, List]] = {}
+    for item, sign in ((old_item, -1), (new_item, 1)):
+        for user_id, currency, amount in order_totals(item):
+            delta = deltas.setdefault(user_id, {}).setdefault(currency, [0, Decimal(0)])
+            delta[0] += sign
+            delta[1] += sign * amount
+
+    for user_id, currencies in deltas.items():
+        names, values, additions = {}, {}, []
+        for i, (currency, (count, amount)) in enumerate(currencies.items()):
+            if count:
+                names[f"#c{i}"] = f"count:{currency}"
+                values[f":c{i}"] = count
+                additions.append(f"#c{i} :c{i}")
+            if amount:
+                names[f"#a{i}"] = f"amount:{currency}"
+                values[f":a{i}"] = amount
+                additions.append(f"#a{i} :a{i}")
+        if not additions:
+            continue
+        try:
+            order_stats_table.update_item(
+                Key={"user_id": user_id},
+                UpdateExpression="ADD " + ", ".join(additions),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+        except (ClientError, DynamoDBUnavailable) as e:
+            # The order itself was written; don't fail the request over stats
+            logger.error("Error updating order stats for %s: %s", user_id, e)
+
 
 def check_requestee_exists(requestee):
+    from boto3.dynamodb.conditions import Key
+
     try:
         response = users_table.query(
             IndexName="telegram_username-index",
@@ -23,12 +115,21 @@ def check_requestee_exists(requestee):
         )
         return len(response.get("Items", [])) > 0
     except ClientError as e:
-        print(f"Error checking user existence: {e}")
+        # DynamoDBUnavailable propagates: a 503 the client retries, not a 404
+        logger.warning("Error checking user existence: %s", e)
         return False
 
 
-@router.post("/", response_model=Order)
-def create_order(order: Order):
+@router.post("/", response_model=Order, dependencies=[Depends(order_admission)])
+def create_order(
+    order: Order,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    # Retries carrying the same Idempotency-Key replay the first response
+    return run_idempotent("orders", idempotency_key, order, lambda: _create_order(order))
+
+
+def _create_order(order: Order):
     if order.timestamp is None:
         order.timestamp = int(time.time())
 
@@ -54,22 +155,119 @@ def create_order(order: Order):
                 detail="Amount and currency are required for USDC orders",
             )
 
+    item = order.dict()
     try:
-        orders_table.put_item(Item=order.dict())
-        return order
+        response = orders_table.put_item(Item=item, ReturnValues="ALL_OLD")
     except ClientError as e:
         raise HTTPException(status_code=500, detail=f"Failed to create order: {str(e)}")
+    update_order_stats(response.get("Attributes"), item)
+    publish_order(order)
+    return order
+
+
+def order_topics(order: Order) -> List[str]:
+    topics = [f"user_id:{order.user_id}"]
+    requestee = order.action_event.details.get("telegram_username")
+    if requestee:
+        topics.append(f"telegram_username:{requestee}")
+    return topics
+
+
+def publish_order(order: Order):
+    order_hub.publish(order_topics(order), order.json())
+
+
+async def stream_order_events(request: Request, subscription):
+    try:
+        while not await request.is_disconnected():
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(), timeout=STREAM_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is LAGGED:
+                # Client fell too far behind; it should resync and reconnect
+                yield "event: lagged\ndata: {}\n\n"
+                break
+            yield f"event: order\ndata: {message}\n\n"
+    finally:
+        order_hub.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_orders(
+    request: Request,
+    telegram_username: Optional[str] = Query(
+        None, description="Receive orders requested from this Telegram user"
+    ),
+    user_id: Optional[str] = Query(None, description="Receive orders created by this user"),
+):
+    if bool(telegram_username) == bool(user_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Exactly one of telegram_username or user_id is required",
+        )
+    if telegram_username:
+        topic = f"telegram_username:{telegram_username}"
+    else:
+        topic = f"user_id:{user_id}"
+    subscription = order_hub.subscribe(topic)
+    return StreamingResponse(
+        stream_order_events(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
+    )
+
+
+def stats_currencies(item: Optional[Dict]) -> Dict[str, Dict]:
+    currencies = {}
+    for name, value in (item or {}).items():
+        kind, _, currency = name.partition(":")
+        if kind in ("count", "amount"):
+            currencies.setdefault(currency, {"count": 0, "amount": Decimal(0)})[kind] = value
+    return currencies
+
+
+@router.get("/stats/{user_id}", response_model=OrderStats)
+def get_order_stats(user_id: str):
+    try:
+        requested = order_stats_table.get_item(Key={"user_id": user_id}).get("Item")
+        user = users_table.get_item(
+            Key={"wallet_public_key": user_id},
+            ProjectionExpression="telegram_username",
+        ).get("Item")
+        received = None
+        if user and user.get("telegram_username"):
+            received = order_stats_table.get_item(
+                Key={"user_id": received_stats_key(user["telegram_username"])}
+            ).get("Item")
+    except ClientError as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to retrieve order stats: {str(e)}"
+        )
+    return {
+        "user_id": user_id,
+        "currencies": stats_currencies(requested),
+        "received": stats_currencies(received),
+    }
 
 
 @router.get("/{order_id}", response_model=Order)
-def get_order(order_id: str):
+def get_order(order_id: str, fields: Optional[str] = FIELDS_QUERY):
+    names = parse_fields(fields, Order)
     try:
-        response = orders_table.get_item(Key={"order_id": order_id})
+        response = orders_table.get_item(
+            Key={"order_id": order_id}, **projection_kwargs(names, keys=["order_id"])
+        )
         item = response.get("Item")
         if not item:
             raise HTTPException(
                 status_code=404, detail=f"Order with ID {order_id} not found"
             )
+        if names:
+            return fields_response(Order, names, item)
         return Order(**item)
     except ClientError as e:
         raise HTTPException(
@@ -78,10 +276,13 @@ def get_order(order_id: str):
 
 
 @router.get("/", response_model=List[Order])
-def list_orders():
+def list_orders(fields: Optional[str] = FIELDS_QUERY):
+    names = parse_fields(fields, Order)
     try:
-        response = orders_table.scan()
+        response = orders_table.scan(**projection_kwargs(names))
         items = response.get("Items", [])
+        if names:
+            return fields_response(Order, names, items)
         return [Order(**item) for item in items]
     except ClientError as e:
         raise HTTPException(status_code=500, detail=f"Failed to list orders: {str(e)}")
@@ -90,10 +291,13 @@ def list_orders():
 @router.delete("/{order_id}", response_model=Dict[str, str])
 def delete_order(order_id: str):
     try:
-        orders_table.delete_item(Key={"order_id": order_id})
-        return {"message": f"Order with ID {order_id} deleted successfully"}
+        response = orders_table.delete_item(
+            Key={"order_id": order_id}, ReturnValues="ALL_OLD"
+        )
     except ClientError as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete order: {str(e)}")
+    update_order_stats(response.get("Attributes"), None)
+    return {"message": f"Order with ID {order_id} deleted successfully"}
 
 
 @router.put("/{order_id}", response_model=Order)
@@ -103,8 +307,10 @@ def update_order(order_id: str, order: Order):
             status_code=400, detail="Order ID in path must match Order ID in body"
         )
 
+    item = order.dict()
     try:
-        response = orders_table.put_item(Item=order.dict())
-        return order
+        response = orders_table.put_item(Item=item, ReturnValues="ALL_OLD")
     except ClientError as e:
         raise HTTPException(status_code=500, detail=f"Failed to update order: {str(e)}")
+    update_order_stats(response.get("Attributes"), item)
+    return order
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import boto3
 from botocore.exceptions import ClientError
 from typing import List, Dict, Optional
 from app.api.models.telegram import TelegramSession
+from app.core.db import get_table
+from app.core.projection import (
+    FIELDS_QUERY,
+    parse_fields,
+    projection_kwargs,
+    fields_response,
+)
 
-# Initialize DynamoDB client
-# Replace with your AWS region
-dynamodb = boto3.resource("dynamodb", region_name="eu-central-1")
-telegram_sessions_table = dynamodb.Table("telegram_sessions")
+# DynamoDB tables, built on first use
+telegram_sessions_table = get_table("telegram_sessions")
 
 # Initialize the router
 router = APIRouter()
@@ -30,16 +34,20 @@ def create_telegram_session(tsesh: TelegramSession):
 
 
 @router.get("/{telegram_user}", response_model=TelegramSession)
-def read_telegram_user(telegram_user: str):
+def read_telegram_user(telegram_user: str, fields: Optional[str] = FIELDS_QUERY):
+    names = parse_fields(fields, TelegramSession)
     try:
         response = telegram_sessions_table.get_item(
-            Key={"telegram_user": telegram_user}
+            Key={"telegram_user": telegram_user},
+            **projection_kwargs(names, keys=["telegram_user"]),
         )
         item = response.get("Item")
         if not item:
             raise HTTPException(
                 status_code=404, detail=f"Session not found for user: {telegram_user}"
             )
+        if names:
+            return fields_response(TelegramSession, names, item)
         return TelegramSession(**item)
     except ClientError as e:
         raise HTTPException(
@@ -48,10 +56,13 @@ def read_telegram_user(telegram_user: str):
 
 
 @router.get("/", response_model=List[TelegramSession])
-def list_telegram_sessions():
+def list_telegram_sessions(fields: Optional[str] = FIELDS_QUERY):
+    names = parse_fields(fields, TelegramSession)
     try:
-        response = telegram_sessions_table.scan()
+        response = telegram_sessions_table.scan(**projection_kwargs(names))
         items = response.get("Items", [])
+        if names:
+            return fields_response(TelegramSession, names, items)
         return [TelegramSession(**item) for item in items]
     except ClientError as e:
         raise HTTPException(
@@ -1,19 +1,43 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List
-from app.api.models.trigger import EventTrigger
+from typing import List, Optional
+from app.api.models.trigger import (
+    EventTrigger,
+    TriggerMatchRequest,
+    TriggerMatchResponse,
+)
 from botocore.exceptions import ClientError
-import boto3
-from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
+from app.core.db import get_table
+from app.core.trigger_index import TriggerIndex
+from app.core.projection import (
+    FIELDS_QUERY,
+    parse_fields,
+    projection_kwargs,
+    fields_response,
+)
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource("dynamodb", region_name="eu-central-1")
-event_triggers_table = dynamodb.Table("triggers")
+# DynamoDB tables, built on first use
+event_triggers_table = get_table("triggers")
 
 router = APIRouter()
 
 
+def load_triggers():
+    scan_kwargs = {"ProjectionExpression": "trigger_id, event_type"}
+    while True:
+        response = event_triggers_table.scan(**scan_kwargs)
+        for item in response.get("Items", []):
+            yield item["trigger_id"], item["event_type"]
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+# Matching index over all triggers, kept current by the write endpoints below
+trigger_index = TriggerIndex(load_triggers)
+
+
 @router.post("/", response_model=EventTrigger, status_code=201)
 def create_event_trigger(event: EventTrigger):
     item = {
@@ -22,6 +46,7 @@ def create_event_trigger(event: EventTrigger):
     }
     try:
         event_triggers_table.put_item(Item=item)
+        trigger_index.add(event.trigger_id, event.event_type)
         return event
     except ClientError as e:
         raise HTTPException(
@@ -30,10 +55,14 @@ def create_event_trigger(event: EventTrigger):
 
 
 @router.get("/{trigger_id}/{event_type}", response_model=EventTrigger)
-def read_event_trigger(trigger_id: int, event_type: str):
+def read_event_trigger(
+    trigger_id: int, event_type: str, fields: Optional[str] = FIELDS_QUERY
+):
+    names = parse_fields(fields, EventTrigger)
     try:
         response = event_triggers_table.get_item(
-            Key={"trigger_id": trigger_id, "event_type": event_type}
+            Key={"trigger_id": trigger_id, "event_type": event_type},
+            **projection_kwargs(names, keys=["trigger_id", "event_type"]),
         )
         item = response.get("Item")
         if not item:
@@ -41,6 +70,8 @@ def read_event_trigger(trigger_id: int, event_type: str):
                 status_code=404,
                 detail=f"Event trigger not found for trigger_id: {trigger_id} and event_type: {event_type}",
             )
+        if names:
+            return fields_response(EventTrigger, names, item)
         return EventTrigger(**item)
     except ClientError as e:
         raise HTTPException(
@@ -48,11 +79,25 @@ def read_event_trigger(trigger_id: int, event_type: str):
         )
 
 
+@router.post("/match", response_model=TriggerMatchResponse)
+def match_event_triggers(request: TriggerMatchRequest):
+    try:
+        matches = trigger_index.match(event.event_type for event in request.events)
+    except ClientError as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to load event triggers: {str(e)}"
+        )
+    return {"matches": [list(trigger_ids) for trigger_ids in matches]}
+
+
 @router.get("/", response_model=List[EventTrigger])
-def list_event_triggers():
+def list_event_triggers(fields: Optional[str] = FIELDS_QUERY):
+    names = parse_fields(fields, EventTrigger)
     try:
-        response = event_triggers_table.scan()
+        response = event_triggers_table.scan(**projection_kwargs(names))
         items = response.get("Items", [])
+        if names:
+            return fields_response(EventTrigger, names, items)
         return [EventTrigger(**item) for item in items]
     except ClientError as e:
         raise HTTPException(
@@ -92,12 +137,13 @@ def update_event_trigger(trigger_id: int, event_type: str, updated_event: EventT
 
 
 @router.delete("/{trigger_id}/{event_type}", status_code=204)
-def delete_event_trigger(trigger_id: str, event_type: str):
+def delete_event_trigger(trigger_id: int, event_type: str):
     try:
         response = event_triggers_table.delete_item(
             Key={"trigger_id": trigger_id, "event_type": event_type},
             ConditionExpression="attribute_exists(trigger_id) AND attribute_exists(event_type)",
         )
+        trigger_index.remove(trigger_id, event_type)
         return
     except ClientError as e:
         if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
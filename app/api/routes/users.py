@@ -1,14 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
-import boto3
 from botocore.exceptions import ClientError
 from typing import List, Optional
 from datetime import datetime
 from app.api.models.users import User, UserResponse, UserCreate, UserUpdate
+from app.core.db import get_table
+from app.core.projection import (
+    FIELDS_QUERY,
+    parse_fields,
+    projection_kwargs,
+    fields_response,
+)
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource("dynamodb", region_name="eu-central-1")
-users_table = dynamodb.Table("users")
+# DynamoDB tables, built on first use
+users_table = get_table("users")
 
 # Initialize the router
 router = APIRouter()
@@ -32,7 +37,7 @@ def format_user(user):
 
 
 @router.post("/", response_model=User, status_code=201)
-async def create_or_update_user(user_input: UserCreate, table=Depends(get_users_table)):
+def create_or_update_user(user_input: UserCreate, table=Depends(get_users_table)):
     try:
         # Check if the user already exists
         response = table.get_item(
@@ -103,10 +108,16 @@ async def create_or_update_user(user_input: UserCreate, table=Depends(get_users_
 
 
 @router.get("/", response_model=List[User])
-async def get_users(table=Depends(get_users_table)):
+def get_users(
+    fields: Optional[str] = FIELDS_QUERY, table=Depends(get_users_table)
+):
+    names = parse_fields(fields, User)
     try:
-        response = table.scan()
+        response = table.scan(**projection_kwargs(names))
         users = response.get("Items", [])
+        if names:
+            users = [{"is_registered": False, **user} for user in users]
+            return fields_response(User, names, users)
         return [format_user(user) for user in users]
     except ClientError as e:
         raise HTTPException(
@@ -116,13 +127,25 @@ async def get_users(table=Depends(get_users_table)):
 
 # Get a specific user by wallet_public_key
 @router.get("/{wallet_public_key}", response_model=UserResponse)
-async def get_user(wallet_public_key: str, table=Depends(get_users_table)):
+def get_user(
+    wallet_public_key: str,
+    fields: Optional[str] = FIELDS_QUERY,
+    table=Depends(get_users_table),
+):
+    names = parse_fields(fields, UserResponse)
     try:
-        response = table.get_item(Key={"wallet_public_key": wallet_public_key})
+        response = table.get_item(
+            Key={"wallet_public_key": wallet_public_key},
+            **projection_kwargs(names, keys=["wallet_public_key"]),
+        )
         user = response.get("Item")
         if not user:
             # Return only is_registered: False
             return {"is_registered": False}
+        elif names:
+            return fields_response(
+                UserResponse, names, {"is_registered": False, **user}
+            )
         else:
             # Return user data with is_registered: True
             return format_user(user)
@@ -134,7 +157,7 @@ async def get_user(wallet_public_key: str, table=Depends(get_users_table)):
 
 # Update a user
 @router.put("/{wallet_public_key}", response_model=User)
-async def update_user(
+def update_user(
     wallet_public_key: str,
     user_update: UserUpdate,
     table=Depends(get_users_table),
@@ -170,7 +193,7 @@ async def update_user(
 
 
 @router.delete("/{wallet_public_key}", status_code=204)
-async def delete_user(wallet_public_key: str, table=Depends(get_users_table)):
+def delete_user(wallet_public_key: str, table=Depends(get_users_table)):
     try:
         response = table.delete_item(
             Key={"wallet_public_key": wallet_public_key}, ReturnValues="ALL_OLD"
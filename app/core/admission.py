@@ -0,0 +1,125 @@
+import json
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+# Sustained requests per second and burst size allowed per caller and route
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "2"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))
+# Requests a single route may have in flight across all callers
+ROUTE_MAX_CONCURRENCY = int(os.getenv("ROUTE_MAX_CONCURRENCY", "32"))
+
+
+class RateLimitStore(ABC):
+    """Token buckets keyed by caller.
+
+    ``consume`` takes ``cost`` tokens and returns 0 when allowed, otherwise the
+    seconds until enough tokens are available. A shared backend only needs to
+    implement this method atomically.
+    """
+
+    @abstractmethod
+    def consume(self, key: str, rate: float, burst: int, cost: float = 1) -> float:
+        ...
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, burst: int, cost: float = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                if len(self._buckets) > self.max_keys:
+                    self._evict_full(now, rate, burst)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / rate
+
+    def _evict_full(self, now: float, rate: float, burst: int):
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [
+            k
+            for k, (tokens, updated_at) in self._buckets.items()
+            if tokens + (now - updated_at) * rate >= burst
+        ]
+        for k in full:
+            del self._buckets[k]
+
+
+_store: RateLimitStore = InMemoryRateLimitStore()
+
+
+def set_rate_limit_store(store: RateLimitStore):
+    global _store
+    _store = store
+
+
+async def caller_identity(request: Request) -> str:
+    # Key on the wallet being written (orders and actions carry it as
+    # user_id) rather than on headers a caller could rotate freely
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        body = None
+    if isinstance(body, dict) and isinstance(body.get("user_id"), str):
+        return f"wallet:{body['user_id']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class AdmissionController:
+    """Route dependency that rejects excess requests before any table access.
+
+    Each caller gets a token bucket per route, and the route as a whole is
+    capped at ``max_concurrency`` in-flight requests. It runs ahead of body
+    validation, so rejected requests cost almost nothing.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: int = RATE_LIMIT_BURST,
+        max_concurrency: int = ROUTE_MAX_CONCURRENCY,
+        store: Optional[RateLimitStore] = None,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.store = store
+        # Only touched from the event loop
+        self.in_flight = 0
+
+    async def __call__(self, request: Request):
+        identity = await caller_identity(request)
+        store = self.store or _store
+        retry_after = store.consume(f"{self.name}:{identity}", self.rate, self.burst)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        if self.in_flight >= self.max_concurrency:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Too many concurrent {self.name} requests",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,191 @@
+import os
+import zlib
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Optional; only gzip is offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional; only gzip is offered without it
+    zstandard = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Content types that are already compressed or must reach the client unbuffered
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip")
+
+
+class GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encoders() -> Dict[str, type]:
+    # Preferred first when the client rates several encodings equally
+    encoders = {}
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    encoders["gzip"] = GzipEncoder
+    return encoders
+
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """Pick the offered encoding with the highest q-value in Accept-Encoding."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses with gzip, or brotli/zstd when installed.
+
+    Routes opt out by sending ``Cache-Control: no-transform``. Streamed
+    responses are compressed chunk by chunk and flushed after each chunk,
+    so they keep arriving incrementally.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encoders()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), list(self.encoders)
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(
+            send, encoding, self.encoders[encoding], self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send, encoding: str, encoder_class: type, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.encoder_class = encoder_class
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _skip(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return True
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return True
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(SKIP_CONTENT_TYPES)
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = self._skip(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                # Whole response is known and small: not worth compressing
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+            self.encoder = self.encoder_class()
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Length is unknown until the stream ends; send chunked
+                del headers["Content-Length"]
+            else:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start_message)
+
+        if more_body:
+            chunk = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            chunk = self.encoder.compress(body) + self.encoder.finish()
+        await self._send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
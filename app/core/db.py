@@ -0,0 +1,90 @@
+import os
+import threading
+from typing import Dict, List
+
+from botocore.exceptions import ClientError
+
+from app.core.resilience import REQUEST_TIMEOUT_SECONDS, ResilientTable, call_dynamodb
+
+REGION_NAME = "eu-central-1"
+
+# A single attempt may not outlive the request budget; botocore's default is 60s
+DYNAMODB_CONNECT_TIMEOUT = min(
+    float(os.getenv("DYNAMODB_CONNECT_TIMEOUT", "2")), REQUEST_TIMEOUT_SECONDS
+)
+DYNAMODB_READ_TIMEOUT = min(
+    float(os.getenv("DYNAMODB_READ_TIMEOUT", "5")), REQUEST_TIMEOUT_SECONDS
+)
+
+_dynamodb = None
+_tables: Dict[str, ResilientTable] = {}
+_lock = threading.Lock()
+
+
+def dynamodb_config():
+    from botocore.config import Config
+
+    # Retries are handled by call_dynamodb, so botocore must not retry as well
+    return Config(
+        retries={"mode": "standard", "total_max_attempts": 1},
+        connect_timeout=DYNAMODB_CONNECT_TIMEOUT,
+        read_timeout=DYNAMODB_READ_TIMEOUT,
+    )
+
+
+def create_dynamodb(session=None):
+    # boto3 is imported here so cold starts don't pay for it until needed
+    import boto3
+
+    return (session or boto3).resource(
+        "dynamodb", region_name=REGION_NAME, config=dynamodb_config()
+    )
+
+
+def get_dynamodb():
+    """DynamoDB resource shared by all routes and reused across warm invocations."""
+    global _dynamodb
+    if _dynamodb is None:
+        with _lock:
+            if _dynamodb is None:
+                _dynamodb = create_dynamodb()
+    return _dynamodb
+
+
+def get_table(name: str) -> ResilientTable:
+    """Table handle that builds the boto3 Table on its first operation."""
+    with _lock:
+        if name not in _tables:
+            _tables[name] = ResilientTable(name, lambda: get_dynamodb().Table(name))
+        return _tables[name]
+
+
+def transact_write(name: str, transact_items: List[Dict]):
+    """TransactWriteItems with plain Python values, as the Table API takes them.
+
+    ``name`` selects the circuit breaker and retry quota the call counts
+    against, normally the table being written.
+    """
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+    serialized = []
+    for entry in transact_items:
+        for operation, params in entry.items():
+            params = dict(params)
+            for field in ("Item", "Key", "ExpressionAttributeValues"):
+                if field in params:
+                    params[field] = {
+                        k: serializer.serialize(v) for k, v in params[field].items()
+                    }
+            serialized.append({operation: params})
+    client = get_dynamodb().meta.client
+    return call_dynamodb(name, client.transact_write_items, TransactItems=serialized)
+
+
+def cancellation_reasons(error: ClientError) -> List[str]:
+    """Per-item reason codes of a TransactionCanceledException, in request order."""
+    return [
+        reason.get("Code", "None")
+        for reason in error.response.get("CancellationReasons", [])
+    ]
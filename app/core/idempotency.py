@@ -0,0 +1,281 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from app.core.db import get_table
+from app.core.resilience import DynamoDBUnavailable
+
+logger = logging.getLogger(__name__)
+
+# How long a completed response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a claim survives if the first attempt dies without completing
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# How long a concurrent duplicate waits for the first attempt to finish
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: Any
+
+
+class IdempotencyStore(ABC):
+    """Dedupe store for Idempotency-Key requests.
+
+    ``claim`` returns the stored response of a finished attempt, or ``None``
+    once the caller owns the key. Duplicates of an in-flight attempt block
+    until it completes or is released.
+    """
+
+    @abstractmethod
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        ...
+
+    @abstractmethod
+    def complete(self, key: str, response: StoredResponse) -> None:
+        ...
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        ...
+
+
+def _mismatch(key: str):
+    return HTTPException(
+        status_code=422,
+        detail=f"Idempotency-Key {key} was already used with a different request body",
+    )
+
+
+def _still_running(key: str):
+    return HTTPException(
+        status_code=409,
+        detail=f"A request with Idempotency-Key {key} is still in progress",
+    )
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires_at: float
+    response: Optional[StoredResponse] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Process-local stand-in for local development and single-worker runs."""
+
+    def __init__(
+        self,
+        ttl: int = IDEMPOTENCY_TTL_SECONDS,
+        lock_ttl: int = IDEMPOTENCY_LOCK_SECONDS,
+        wait_timeout: float = IDEMPOTENCY_WAIT_SECONDS,
+    ):
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._claims = 0
+
+    def _sweep(self, now: float):
+        expired = [k for k, e in self._entries.items() if e.expires_at <= now]
+        for k in expired:
+            self._entries.pop(k).done.set()
+
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                now = time.time()
+                self._claims += 1
+                if self._claims % 1024 == 0:
+                    self._sweep(now)
+                entry = self._entries.get(key)
+                if entry is None or entry.expires_at <= now:
+                    self._entries[key] = _Entry(fingerprint, now + self.lock_ttl)
+                    return None
+                if entry.fingerprint != fingerprint:
+                    raise _mismatch(key)
+                if entry.response is not None:
+                    return entry.response
+                done = entry.done
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not done.wait(remaining):
+                raise _still_running(key)
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.response = response
+            entry.expires_at = time.time() + self.ttl
+            entry.done.set()
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+
+class DynamoDBIdempotencyStore(IdempotencyStore):
+    """Shared store on a table keyed by ``idempotency_key``.
+
+    The table should have DynamoDB TTL enabled on ``expires_at``; expired
+    items are also treated as absent before TTL deletion catches up.
+    """
+
+    def __init__(
+        self,
+        table_name: str = "idempotency_keys",
+        ttl: int = IDEMPOTENCY_TTL_SECONDS,
+        lock_ttl: int = IDEMPOTENCY_LOCK_SECONDS,
+        wait_timeout: float = IDEMPOTENCY_WAIT_SECONDS,
+        poll_interval: float = 0.1,
+    ):
+        self.table = get_table(table_name)
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            now = int(time.time())
+            try:
+                self.table.put_item(
+                    Item={
+                        "idempotency_key": key,
+                        "fingerprint": fingerprint,
+                        "state": "in_progress",
+                        "expires_at": now + self.lock_ttl,
+                    },
+                    ConditionExpression="attribute_not_exists(idempotency_key) OR expires_at < :now",
+                    ExpressionAttributeValues={":now": now},
+                )
+                return None
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise HTTPException(status_code=500, detail=str(e))
+
+            try:
+                item = self.table.get_item(
+                    Key={"idempotency_key": key}, ConsistentRead=True
+                ).get("Item")
+            except ClientError as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            if item is None:
+                continue
+            if item["fingerprint"] != fingerprint:
+                raise _mismatch(key)
+            if item["state"] == "completed":
+                return StoredResponse(
+                    status_code=int(item["status_code"]), body=json.loads(item["body"])
+                )
+            if time.monotonic() >= deadline:
+                raise _still_running(key)
+            time.sleep(self.poll_interval)
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        try:
+            self.table.update_item(
+                Key={"idempotency_key": key},
+                UpdateExpression="SET #s = :s, status_code = :c, body = :b, expires_at = :e",
+                ExpressionAttributeNames={"#s": "state"},
+                ExpressionAttributeValues={
+                    ":s": "completed",
+                    ":c": response.status_code,
+                    ":b": json.dumps(response.body),
+                    ":e": int(time.time()) + self.ttl,
+                },
+            )
+        except (ClientError, DynamoDBUnavailable) as e:
+            # The write itself succeeded but can't be replayed. Free the claim so
+            # a retry runs the handler again now instead of getting 409s until
+            # lock_ttl; if this fails too, the claim simply expires.
+            logger.warning("Error storing idempotent response for %s: %s", key, e)
+            self.release(key)
+
+    def release(self, key: str) -> None:
+        try:
+            self.table.delete_item(
+                Key={"idempotency_key": key},
+                ConditionExpression="#s = :s",
+                ExpressionAttributeNames={"#s": "state"},
+                ExpressionAttributeValues={":s": "in_progress"},
+            )
+        except DynamoDBUnavailable as e:
+            # The claim expires after lock_ttl anyway
+            logger.warning("Error releasing idempotency key %s: %s", key, e)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logger.warning("Error releasing idempotency key %s: %s", key, e)
+
+
+_store: Optional[IdempotencyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if os.getenv("IDEMPOTENCY_STORE", "dynamodb") == "memory":
+                    _store = InMemoryIdempotencyStore()
+                else:
+                    _store = DynamoDBIdempotencyStore()
+    return _store
+
+
+def fingerprint_payload(payload: Any) -> str:
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def run_idempotent(
+    scope: str, idempotency_key: Optional[str], payload: Any, handler: Callable[[], Any]
+):
+    """Run ``handler`` at most once per ``scope`` and Idempotency-Key.
+
+    Successful results and 4xx errors are stored and replayed; 5xx errors and
+    unexpected exceptions release the key so a retry runs the handler again.
+    """
+    if not idempotency_key:
+        return handler()
+
+    store = get_idempotency_store()
+    key = f"{scope}:{idempotency_key}"
+    stored = store.claim(key, fingerprint_payload(payload))
+    if stored is not None:
+        if stored.status_code >= 400:
+            raise HTTPException(status_code=stored.status_code, detail=stored.body)
+        return stored.body
+
+    try:
+        result = handler()
+    except HTTPException as e:
+        if e.status_code < 500:
+            store.complete(key, StoredResponse(e.status_code, jsonable_encoder(e.detail)))
+        else:
+            store.release(key)
+        raise
+    except BaseException:
+        store.release(key)
+        raise
+    store.complete(key, StoredResponse(200, jsonable_encoder(result)))
+    return result
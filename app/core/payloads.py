@@ -0,0 +1,75 @@
+import json
+import os
+import zlib
+from decimal import Decimal
+from typing import Any, Optional
+
+# JSON payloads at least this many bytes are stored compressed; unset disables
+PAYLOAD_COMPRESSION_THRESHOLD = os.getenv("PAYLOAD_COMPRESSION_THRESHOLD")
+
+# Leading byte of a compressed payload, so the format can change later
+ZLIB_JSON = b"\x01"
+
+
+def compression_threshold() -> Optional[int]:
+    if not PAYLOAD_COMPRESSION_THRESHOLD:
+        return None
+    return int(PAYLOAD_COMPRESSION_THRESHOLD)
+
+
+def _json_number(value: Any):
+    # Items read from DynamoDB or parsed with parse_float=Decimal hold Decimals
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(f"{value} is not a valid JSON number")
+        if value == value.to_integral_value():
+            return int(value)
+        number = float(value)
+        if Decimal(repr(number)) == value:
+            return number
+        raise ValueError(f"{value} cannot be stored as a JSON number without losing precision")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_payload(value: Any, threshold: Optional[int] = None):
+    """Return the attribute value to store for a JSON payload.
+
+    Payloads over the threshold become a single Binary attribute holding
+    compressed JSON; smaller ones stay plain DynamoDB maps.
+    """
+    if threshold is None:
+        threshold = compression_threshold()
+    if value is None or threshold is None:
+        return value
+    try:
+        raw = json.dumps(value, separators=(",", ":"), default=_json_number).encode()
+    except ValueError:
+        # Numbers JSON can't hold exactly are kept exact in a DynamoDB map
+        return value
+    if len(raw) < threshold:
+        return value
+    from boto3.dynamodb.types import Binary
+
+    return Binary(ZLIB_JSON + zlib.compress(raw))
+
+
+def is_encoded(stored: Any) -> bool:
+    # Payloads are only read after a table call, so boto3 is already loaded
+    from boto3.dynamodb.types import Binary
+
+    return isinstance(stored, (Binary, bytes))
+
+
+def payload_json_bytes(stored: Any) -> bytes:
+    """JSON bytes of an encoded payload, without parsing them."""
+    data = stored if isinstance(stored, bytes) else bytes(stored.value)
+    if data[:1] != ZLIB_JSON:
+        raise ValueError("Unknown payload encoding")
+    return zlib.decompress(data[1:])
+
+
+def decode_payload(stored: Any):
+    """Decode a stored payload; legacy map-encoded values are returned as is."""
+    if is_encoded(stored):
+        return json.loads(payload_json_bytes(stored))
+    return stored
@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Type, Union
+
+from fastapi import HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, create_model
+
+FIELDS_QUERY = Query(
+    None, description="Comma-separated attributes to return, e.g. fields=a,b"
+)
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. "
+            f"Allowed: {', '.join(model.model_fields)}",
+        )
+    return names
+
+
+def projection_kwargs(names: Optional[Iterable[str]], keys: Iterable[str] = ()) -> Dict:
+    """ProjectionExpression kwargs for ``names`` plus the table's key attributes.
+
+    Every attribute goes through an ExpressionAttributeNames alias so reserved
+    words such as ``timestamp`` or ``json`` are safe to request.
+    """
+    if names is None:
+        return {}
+    attributes = list(dict.fromkeys([*keys, *names]))
+    aliases = {f"#p{i}": name for i, name in enumerate(attributes)}
+    return {
+        "ProjectionExpression": ", ".join(aliases),
+        "ExpressionAttributeNames": aliases,
+    }
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    fields = {}
+    for name in names:
+        field = model.model_fields[name]
+        fields[name] = (
+            Optional[field.annotation],
+            Field(None, description=field.description),
+        )
+    return create_model(f"{model.__name__}Fields", **fields)
+
+
+def select_fields(model: Type[BaseModel], names: Tuple[str, ...], item: Dict) -> Dict:
+    trimmed = partial_model(model, names)(**{k: item[k] for k in names if k in item})
+    return trimmed.model_dump()
+
+
+def fields_response(
+    model: Type[BaseModel], names: Tuple[str, ...], data: Union[Dict, list]
+) -> JSONResponse:
+    """Response trimmed to ``names``, bypassing the route's full response_model."""
+    if isinstance(data, list):
+        content = [select_fields(model, names, item) for item in data]
+    else:
+        content = select_fields(model, names, data)
+    return JSONResponse(content=jsonable_encoder(content))
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import threading
+from typing import Dict, Iterable, Set
+
+# Messages buffered per subscriber before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "100"))
+
+# Delivered in place of messages once a subscriber's buffer overflows
+LAGGED = object()
+
+
+class Subscription:
+    def __init__(self, topic: str, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.topic = topic
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def _offer(self, message):
+        # Runs on the subscriber's event loop
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop the backlog and tell the consumer to resync instead of
+            # letting one slow client hold an unbounded amount of memory
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(LAGGED)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class PubSubHub:
+    """In-process topic fan-out from request handlers to streaming clients.
+
+    ``publish`` is thread-safe so it can be called from sync route handlers
+    running in the threadpool. Only subscribers connected to the same worker
+    process receive messages.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(
+            topic, asyncio.get_running_loop(), self.queue_size
+        )
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[subscription.topic]
+
+    def publish(self, topics: Iterable[str], message) -> int:
+        with self._lock:
+            targets = set()
+            for topic in topics:
+                targets.update(self._topics.get(topic, ()))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, message)
+            except RuntimeError:
+                # Subscriber's loop has shut down
+                self.unsubscribe(subscription)
+        return len(targets)
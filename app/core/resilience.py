@@ -0,0 +1,283 @@
+import functools
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+# Upper bound for a request's DynamoDB budget; clients may ask for less
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "10"))
+
+THROTTLING_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+TRANSIENT_ERRORS = {
+    "InternalServerError",
+    "InternalFailure",
+    "ServiceUnavailable",
+}
+CONNECTION_ERRORS = (
+    EndpointConnectionError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    ReadTimeoutError,
+)
+
+# Table operations wrapped by ResilientTable
+TABLE_OPERATIONS = {"get_item", "put_item", "update_item", "delete_item", "query", "scan"}
+
+
+class DynamoDBUnavailable(Exception):
+    """Raised instead of queueing more work on a degraded table; served as a 503."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    # Tokens taken from the table's retry quota for each retry
+    cost: int
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from concurrent requests apart
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+RETRY_POLICIES = {
+    "throttling": RetryPolicy(max_attempts=5, base_delay=0.05, max_delay=2.0, cost=5),
+    "transient": RetryPolicy(max_attempts=3, base_delay=0.025, max_delay=0.5, cost=10),
+}
+
+
+class RetryQuota:
+    """Token bucket that shrinks retries when most calls are failing.
+
+    Retries spend tokens and successful calls earn them back, so a healthy
+    table retries freely while a degraded one quickly stops being retried.
+    """
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: int) -> bool:
+        with self._lock:
+            if self.tokens < cost:
+                return False
+            self.tokens -= cost
+            return True
+
+    def refund(self, amount: int = 1):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self, name: str):
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                # Let a single request through to probe the table
+                self._probing = True
+                return
+        raise DynamoDBUnavailable(
+            f"DynamoDB table {name} is unavailable", retry_after=max(remaining, 1.0)
+        )
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self):
+        """End a call that says nothing about the table's health."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_quotas: Dict[str, RetryQuota] = {}
+_registry_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker()
+        return _breakers[name]
+
+
+def get_retry_quota(name: str) -> RetryQuota:
+    with _registry_lock:
+        if name not in _quotas:
+            _quotas[name] = RetryQuota()
+        return _quotas[name]
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("dynamodb_deadline", default=None)
+
+
+def parse_request_timeout(value: Optional[str]) -> float:
+    try:
+        timeout = float(value) if value else REQUEST_TIMEOUT_SECONDS
+    except ValueError:
+        timeout = REQUEST_TIMEOUT_SECONDS
+    return max(0.0, min(timeout, REQUEST_TIMEOUT_SECONDS))
+
+
+def set_request_deadline(timeout: float):
+    return _deadline.set(time.monotonic() + timeout)
+
+
+def reset_request_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    if isinstance(error, CONNECTION_ERRORS):
+        return "transient"
+    if isinstance(error, ClientError):
+        code = error.response["Error"]["Code"]
+        if code in THROTTLING_ERRORS:
+            return "throttling"
+        if code in TRANSIENT_ERRORS:
+            return "transient"
+        if code == "TransactionCanceledException":
+            reasons = {
+                reason.get("Code")
+                for reason in error.response.get("CancellationReasons", [])
+            }
+            # Lost a race with another transaction rather than failing a condition
+            if "TransactionConflict" in reasons and "ConditionalCheckFailed" not in reasons:
+                return "transient"
+    return None
+
+
+def _call_with_retries(name: str, quota: RetryQuota, operation: Callable, args, kwargs):
+    attempt = 0
+    while True:
+        try:
+            result = operation(*args, **kwargs)
+        except (ClientError, *CONNECTION_ERRORS) as e:
+            error_class = classify_error(e)
+            if error_class is None:
+                raise
+            policy = RETRY_POLICIES[error_class]
+            attempt += 1
+            delay = policy.backoff(attempt)
+            remaining = remaining_time()
+            if (
+                attempt >= policy.max_attempts
+                or (remaining is not None and delay >= remaining)
+                or not quota.acquire(policy.cost)
+            ):
+                raise DynamoDBUnavailable(
+                    f"DynamoDB table {name} is overloaded: {e}",
+                    retry_after=1.0 if error_class == "throttling" else 0.5,
+                ) from e
+            time.sleep(delay)
+            continue
+        quota.refund()
+        return result
+
+
+def call_dynamodb(name: str, operation: Callable, *args, **kwargs):
+    """Call a DynamoDB operation with retries, a circuit breaker and the request deadline.
+
+    Errors that are neither throttling nor transient (conditional check
+    failures, validation errors) are raised unchanged on the first attempt.
+    The breaker is consulted once per call, not per retry, and always learns
+    how the call ended so a half-open probe can't be left outstanding.
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DynamoDBUnavailable(f"Request deadline exceeded calling {name}")
+    breaker = get_circuit_breaker(name)
+    breaker.before_call(name)
+    outcome = None
+    try:
+        result = _call_with_retries(name, get_retry_quota(name), operation, args, kwargs)
+        outcome = "success"
+        return result
+    except DynamoDBUnavailable:
+        outcome = "failure"
+        raise
+    except ClientError:
+        # The table answered; the request itself was bad
+        outcome = "success"
+        raise
+    finally:
+        if outcome == "success":
+            breaker.record_success()
+        elif outcome == "failure":
+            breaker.record_failure()
+        else:
+            # Failed before reaching the table (bad parameters, serialization)
+            breaker.release_probe()
+
+
+class ResilientTable:
+    """Wraps a boto3 Table so every item operation goes through call_dynamodb.
+
+    The Table is only built by ``loader`` when it is first used.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._table = None
+
+    def __getattr__(self, attr):
+        if self._table is None:
+            self._table = self._loader()
+        value = getattr(self._table, attr)
+        if attr in TABLE_OPERATIONS:
+            return functools.partial(call_dynamodb, self.name, value)
+        return value
@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TriggerIndex:
+    """In-memory ``event_type`` -> trigger_id index for matching events.
+
+    Readers use an immutable snapshot swapped in on every change, so matching
+    never takes a lock. Writes are rare compared to matches and rebuild only
+    the affected event_type. Once loaded, a stale index is reloaded by one
+    caller while everyone else keeps matching against the current snapshot.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[Tuple[int, str]]], ttl: float = 60):
+        self.loader = loader
+        # Reload interval so writes made by other workers are eventually seen
+        self.ttl = ttl
+        self._index: Dict[str, Tuple[int, ...]] = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        # Writes made while a reload is scanning, replayed onto its result
+        self._pending: Optional[List[Tuple[bool, int, str]]] = None
+
+    def ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        # Only the very first load makes callers wait
+        if not self._reload_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at is not loaded_at:
+                return  # Another thread reloaded while we waited
+            with self._lock:
+                self._pending = []
+            try:
+                triggers = list(self.loader())
+            except Exception as e:
+                with self._lock:
+                    self._pending = None
+                if loaded_at is None:
+                    raise
+                # A stale index beats failing the caller; the next one retries
+                logger.warning("Reloading trigger index failed: %s", e)
+                return
+            with self._lock:
+                pending, self._pending = self._pending, None
+                self._replace(triggers)
+                for added, trigger_id, event_type in pending:
+                    self._apply(added, trigger_id, event_type)
+        finally:
+            self._reload_lock.release()
+
+    def _replace(self, triggers: Iterable[Tuple[int, str]]):
+        grouped: Dict[str, set] = {}
+        for trigger_id, event_type in triggers:
+            grouped.setdefault(event_type, set()).add(int(trigger_id))
+        self._index = {k: tuple(sorted(v)) for k, v in grouped.items()}
+        self._loaded_at = time.monotonic()
+
+    def _apply(self, added: bool, trigger_id: int, event_type: str):
+        ids = set(self._index.get(event_type, ()))
+        if added:
+            ids.add(int(trigger_id))
+        else:
+            ids.discard(int(trigger_id))
+        index = dict(self._index)
+        if ids:
+            index[event_type] = tuple(sorted(ids))
+        else:
+            index.pop(event_type, None)
+        self._index = index
+
+    def _write(self, added: bool, trigger_id: int, event_type: str):
+        with self._lock:
+            self._apply(added, trigger_id, event_type)
+            if self._pending is not None:
+                self._pending.append((added, trigger_id, event_type))
+
+    def add(self, trigger_id: int, event_type: str):
+        self._write(True, trigger_id, event_type)
+
+    def remove(self, trigger_id: int, event_type: str):
+        self._write(False, trigger_id, event_type)
+
+    def match(self, event_types: Iterable[str]) -> List[Tuple[int, ...]]:
+        self.ensure_loaded()
+        index = self._index
+        return [index.get(event_type, ()) for event_type in event_types]
@@ -1,6 +1,15 @@
 import logging
+import math
 from fastapi import FastAPI, Response, Request
+from fastapi.responses import JSONResponse
 from app.api.main import api_router
+from app.core.compression import CompressionMiddleware
+from app.core.resilience import (
+    DynamoDBUnavailable,
+    parse_request_timeout,
+    set_request_deadline,
+    reset_request_deadline,
+)
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(
@@ -16,9 +25,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all HTTP methods
     allow_headers=["*"],  # Allows all headers
-    expose_headers=["X-Action-Version", "X-Blockchain-Ids"],
+    expose_headers=["X-Action-Version", "X-Blockchain-Ids", "X-Next-Cursor"],
 )
 
+# Compress large responses; routes opt out with Cache-Control: no-transform
+app.add_middleware(CompressionMiddleware)
+
 
 # Custom middleware to append required headers to every response
 @app.middleware("http")
@@ -35,6 +47,26 @@ async def add_custom_headers(request: Request, call_next):
     return response
 
 
+# Bound the time DynamoDB calls may take, optionally tightened by the client
+@app.middleware("http")
+async def propagate_request_deadline(request: Request, call_next):
+    timeout = parse_request_timeout(request.headers.get("X-Request-Timeout"))
+    token = set_request_deadline(timeout)
+    try:
+        return await call_next(request)
+    finally:
+        reset_request_deadline(token)
+
+
+@app.exception_handler(DynamoDBUnavailable)
+async def dynamodb_unavailable_handler(request: Request, exc: DynamoDBUnavailable):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 # Configure logging
 logging.basicConfig(
     level=logging.DEBUG,  # Change to INFO or WARNING in production
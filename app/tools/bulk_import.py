@@ -0,0 +1,325 @@
+"""Bulk import of JSONL files into the API's DynamoDB tables.
+
+Each line is validated against the same Pydantic model the API uses, then
+written with concurrent BatchWriteItem calls limited to a target write
+capacity. Progress is checkpointed so an interrupted import can be resumed.
+
+    python -m app.tools.bulk_import orders orders.jsonl --wcu 200 --workers 8
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Tuple, Type
+
+import boto3
+from pydantic import BaseModel, ValidationError
+
+from app.api.models.action_types import ActionType
+from app.api.models.actions import Action
+from app.api.models.orders import Order
+from app.api.models.trigger import EventTrigger
+from app.api.models.users import User
+from app.core.admission import InMemoryRateLimitStore
+from app.core.payloads import encode_payload
+from app.core.db import create_dynamodb
+from app.core.resilience import DynamoDBUnavailable, call_dynamodb
+from app.tools.rebuild_order_stats import rebuild_order_stats
+
+# DynamoDB's limit on items per BatchWriteItem call
+BATCH_SIZE = 25
+MAX_BATCH_ATTEMPTS = 10
+
+
+def action_item(action: Action) -> Dict:
+    item = action.dict()
+    item["payload"] = encode_payload(action.payload)
+    return item
+
+
+def action_type_item(action_type: ActionType) -> Dict:
+    item = action_type.dict()
+    item["json"] = encode_payload(action_type.json)
+    return item
+
+
+def order_item(order: Order) -> Dict:
+    # Same default as create_order
+    if order.timestamp is None:
+        order.timestamp = int(time.time())
+    return order.dict()
+
+
+@dataclass
+class ImportSpec:
+    table: str
+    model: Type[BaseModel]
+    key: Tuple[str, ...]
+    to_item: Callable[[BaseModel], Dict]
+
+
+SPECS = {
+    "users": ImportSpec("users", User, ("wallet_public_key",), lambda m: m.dict()),
+    "actions": ImportSpec("actions", Action, ("action_id",), action_item),
+    "orders": ImportSpec("orders", Order, ("order_id",), order_item),
+    "action_types": ImportSpec("action_types", ActionType, ("type_id",), action_type_item),
+    "triggers": ImportSpec(
+        "triggers",
+        EventTrigger,
+        ("trigger_id", "event_type"),
+        lambda m: m.dict(exclude_none=True),
+    ),
+}
+
+
+def write_units(item: Dict) -> int:
+    size = len(json.dumps(item, default=str))
+    return max(1, math.ceil(size / 1024))
+
+
+class Stats:
+    def __init__(self):
+        self.written = 0
+        self.rejected = 0
+        self.units = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, written: int, units: int):
+        with self._lock:
+            self.written += written
+            self.units += units
+
+    def report(self, line: int):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(
+            f"line {line}: {self.written} written, {self.rejected} rejected, "
+            f"{self.written / elapsed:,.0f} items/s, {self.units / elapsed:,.0f} WCU/s",
+            file=sys.stderr,
+        )
+
+
+class Checkpoint:
+    """Tracks the first line not yet durably written.
+
+    Batches finish out of order, so the checkpoint only advances over a
+    contiguous run of finished line ranges. Resuming may rewrite a few items
+    past it, which is harmless because puts are idempotent.
+    """
+
+    def __init__(self, path: str, source: str, line: int):
+        self.path = path
+        self.source = source
+        self.line = line
+        self._finished: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, source: str) -> "Checkpoint":
+        line = 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("source") != source:
+                raise SystemExit(f"Checkpoint {path} belongs to {saved.get('source')}")
+            line = saved["line"]
+        return cls(path, source, line)
+
+    def finish(self, start: int, end: int):
+        with self._lock:
+            self._finished[start] = end
+            while self.line in self._finished:
+                self.line = self._finished.pop(self.line)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            state = {"source": self.source, "line": self.line}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+
+def read_batches(
+    path: str, spec: ImportSpec, start: int, stats: Stats
+) -> Iterator[Tuple[int, int, List[Dict]]]:
+    """Yield (first_line, next_line, items) covering every line from ``start``."""
+    batch: Dict[Tuple, Dict] = {}
+    first = next_line = start
+    with open(path) as f:
+        for number, line in enumerate(f):
+            if number < start:
+                continue
+            next_line = number + 1
+            if not line.strip():
+                continue
+            try:
+                model = spec.model(**json.loads(line, parse_float=Decimal))
+                item = spec.to_item(model)
+            except ValidationError as e:
+                stats.rejected += 1
+                errors = "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                )
+                print(f"line {number}: rejected: {errors}", file=sys.stderr)
+                continue
+            except (ValueError, TypeError) as e:
+                stats.rejected += 1
+                print(f"line {number}: rejected: {e}", file=sys.stderr)
+                continue
+            # Duplicate keys in one BatchWriteItem are an error; last wins
+            batch[tuple(item[k] for k in spec.key)] = item
+            if len(batch) == BATCH_SIZE:
+                yield first, next_line, list(batch.values())
+                batch = {}
+                first = next_line
+    if first < next_line:
+        yield first, next_line, list(batch.values())
+
+
+class BatchWriter:
+    def __init__(self, table: str, wcu: float):
+        self.table = table
+        self.wcu = wcu
+        self.limiter = InMemoryRateLimitStore()
+        self._local = threading.local()
+
+    def _resource(self):
+        # boto3 resources are not thread-safe; give each worker its own
+        if not hasattr(self._local, "dynamodb"):
+            self._local.dynamodb = create_dynamodb(boto3.session.Session())
+        return self._local.dynamodb
+
+    def _throttle(self, units: int):
+        cost = min(units, self.wcu)
+        while True:
+            wait = self.limiter.consume(self.table, self.wcu, self.wcu, cost)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def write(self, items: List[Dict]) -> int:
+        dynamodb = self._resource()
+        pending = [{"PutRequest": {"Item": item}} for item in items]
+        units = 0
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            batch_units = sum(write_units(r["PutRequest"]["Item"]) for r in pending)
+            self._throttle(batch_units)
+            try:
+                response = call_dynamodb(
+                    self.table,
+                    dynamodb.batch_write_item,
+                    RequestItems={self.table: pending},
+                )
+            except DynamoDBUnavailable as e:
+                time.sleep(e.retry_after)
+                continue
+            pending = response.get("UnprocessedItems", {}).get(self.table, [])
+            units += batch_units - sum(
+                write_units(r["PutRequest"]["Item"]) for r in pending
+            )
+            if not pending:
+                return units
+            time.sleep(random.uniform(0, min(5.0, 0.1 * 2**attempt)))
+        raise RuntimeError(f"{len(pending)} items still unprocessed after retries")
+
+
+def run(args) -> int:
+    spec = SPECS[args.model]
+    table = args.table or spec.table
+    checkpoint = Checkpoint.load(args.checkpoint, os.path.abspath(args.file))
+    stats = Stats()
+    writer = BatchWriter(table, args.wcu)
+    failed = threading.Event()
+    slots = threading.BoundedSemaphore(args.workers * 2)
+
+    def on_done(future, start, end, count):
+        slots.release()
+        if future.exception() is not None:
+            print(f"lines {start}-{end}: failed: {future.exception()}", file=sys.stderr)
+            failed.set()
+            return
+        stats.add(count, future.result())
+        checkpoint.finish(start, end)
+
+    stop_reporting = threading.Event()
+
+    def report():
+        while not stop_reporting.wait(args.progress_interval):
+            checkpoint.save()
+            stats.report(checkpoint.line)
+
+    reporter = threading.Thread(target=report, daemon=True)
+    reporter.start()
+    print(f"importing {args.file} into {table} from line {checkpoint.line}", file=sys.stderr)
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for start, end, items in read_batches(args.file, spec, checkpoint.line, stats):
+                if failed.is_set():
+                    break
+                if not items:
+                    checkpoint.finish(start, end)
+                    continue
+                slots.acquire()
+                future = pool.submit(writer.write, items)
+                future.add_done_callback(
+                    lambda f, s=start, e=end, n=len(items): on_done(f, s, e, n)
+                )
+    finally:
+        stop_reporting.set()
+        # Only one thread may write the checkpoint file at a time
+        reporter.join()
+        checkpoint.save()
+        stats.report(checkpoint.line)
+    if failed.is_set():
+        return 1
+    if args.model == "orders" and not args.skip_stats_rebuild:
+        # Batch puts bypass create_order, so recompute the stats it maintains
+        print("rebuilding order stats", file=sys.stderr)
+        rebuild_order_stats(orders_table=table)
+    if stats.rejected > args.max_rejects:
+        print(
+            f"{stats.rejected} lines rejected (--max-rejects {args.max_rejects})",
+            file=sys.stderr,
+        )
+        return 2
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("model", choices=sorted(SPECS))
+    parser.add_argument("file", help="JSONL file with one item per line")
+    parser.add_argument("--table", help="Target table (defaults to the model's table)")
+    parser.add_argument("--wcu", type=float, default=100, help="Target write capacity units per second")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--checkpoint", help="File to resume from and save progress to")
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    parser.add_argument(
+        "--max-rejects",
+        type=int,
+        default=0,
+        help="Invalid lines tolerated before the import exits non-zero",
+    )
+    parser.add_argument(
+        "--skip-stats-rebuild",
+        action="store_true",
+        help="Don't rebuild order_stats after importing orders",
+    )
+    sys.exit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Rebuild the order_stats table from the orders table.
+
+Stats are normally kept current by the order endpoints with atomic ADDs.
+This recomputes every stats item from a full scan of the orders, to
+backfill existing orders, account for bulk imports and repair drift left
+by failed updates. Orders written while it runs may be counted twice or
+missed, so run it when order traffic is low.
+
+    python -m app.tools.rebuild_order_stats
+"""
+
+import argparse
+import sys
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator
+
+from app.api.routes.orders import order_totals
+from app.core.db import get_table
+
+
+def scan_all(table, **scan_kwargs) -> Iterator[Dict]:
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def compute_order_stats(orders: Iterable[Dict]) -> Dict[str, Dict]:
+    """Stats items, keyed like order_stats, for the given orders."""
+    stats: Dict[str, Dict] = {}
+    for order in orders:
+        for user_id, currency, amount in order_totals(order):
+            item = stats.setdefault(user_id, {})
+            item[f"count:{currency}"] = item.get(f"count:{currency}", 0) + 1
+            item[f"amount:{currency}"] = item.get(f"amount:{currency}", Decimal(0)) + amount
+    return stats
+
+
+def rebuild_order_stats(orders_table: str = "orders", stats_table: str = "order_stats") -> int:
+    """Replace every stats item with one recomputed from the orders.
+
+    Returns the number of stats items written.
+    """
+    orders = get_table(orders_table)
+    stats = get_table(stats_table)
+    computed = compute_order_stats(
+        scan_all(
+            orders,
+            ProjectionExpression="user_id, app, action_event",
+        )
+    )
+    for user_id, item in computed.items():
+        stats.put_item(Item={"user_id": user_id, **item})
+    # Users whose orders are all gone keep no stats
+    stale = [
+        item["user_id"]
+        for item in scan_all(stats, ProjectionExpression="user_id")
+        if item["user_id"] not in computed
+    ]
+    for user_id in stale:
+        stats.delete_item(Key={"user_id": user_id})
+    return len(computed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--orders-table", default="orders")
+    parser.add_argument("--stats-table", default="order_stats")
+    args = parser.parse_args()
+    written = rebuild_order_stats(args.orders_table, args.stats_table)
+    print(f"rebuilt {written} order stats items", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
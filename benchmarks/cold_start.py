@@ -0,0 +1,125 @@
+"""Cold-start cost of the serverless entry point (app/main.py).
+
+Each run starts a fresh interpreter and reports:
+
+- import: time to import ``app.main``
+- first response: import plus the first request through the ASGI app
+- dynamodb init: building the shared DynamoDB resource and a Table, which
+  the first request that touches a table pays for
+
+Run with ``python -m benchmarks.cold_start``. No AWS access is needed.
+Pass ``--max-first-response-ms`` to fail when a regression pushes the median
+above a budget.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+async def _request(app, method: str, path: str, query: str = "") -> int:
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+def measure():
+    start = time.perf_counter()
+    from app.main import app
+
+    imported = time.perf_counter()
+    # Goes through middleware, routing and a handler without touching AWS
+    status = asyncio.run(_request(app, "GET", "/orders/stream"))
+    responded = time.perf_counter()
+
+    from app.core.db import get_dynamodb
+
+    get_dynamodb().Table("users")
+    initialized = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "import_ms": (imported - start) * 1000,
+                "first_response_ms": (responded - start) * 1000,
+                "dynamodb_init_ms": (initialized - responded) * 1000,
+                "status": status,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-first-response-ms", type=float)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure()
+        return
+
+    env = dict(os.environ)
+    # botocore needs a region and credentials to build clients, not to import
+    env.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    env.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    env["PYTHONWARNINGS"] = "ignore"
+
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in ("import_ms", "first_response_ms", "dynamodb_init_ms"):
+        values = [r[key] for r in results]
+        print(
+            f"{key:>18}: median {statistics.median(values):7.1f}  "
+            f"min {min(values):7.1f}  max {max(values):7.1f}"
+        )
+
+    median = statistics.median(r["first_response_ms"] for r in results)
+    if args.max_first_response_ms is not None and median > args.max_first_response_ms:
+        print(
+            f"first response {median:.1f}ms exceeds budget of "
+            f"{args.max_first_response_ms:.1f}ms"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Throughput of POST /triggers/match against an in-memory trigger set.
+
+Run with ``python -m benchmarks.trigger_matching``. No AWS access is needed:
+the index is loaded from generated triggers instead of the triggers table.
+"""
+
+import argparse
+import random
+import time
+
+from app.api.models.trigger import TriggerMatchRequest
+from app.api.routes import triggers
+
+
+def generate_triggers(count: int, event_types: int):
+    return [(trigger_id, f"event_{trigger_id % event_types}") for trigger_id in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--triggers", type=int, default=100_000)
+    parser.add_argument("--event-types", type=int, default=1_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=200)
+    args = parser.parse_args()
+
+    generated = generate_triggers(args.triggers, args.event_types)
+    triggers.trigger_index.loader = lambda: generated
+
+    start = time.perf_counter()
+    triggers.trigger_index.ensure_loaded()
+    print(f"index build: {args.triggers} triggers in {time.perf_counter() - start:.3f}s")
+
+    # Include some event types that match nothing
+    names = [f"event_{i}" for i in range(args.event_types + args.event_types // 10)]
+    requests = [
+        TriggerMatchRequest(
+            events=[{"event_type": random.choice(names)} for _ in range(args.batch_size)]
+        )
+        for _ in range(args.batches)
+    ]
+
+    matched = 0
+    start = time.perf_counter()
+    for request in requests:
+        response = triggers.match_event_triggers(request)
+        matched += sum(len(ids) for ids in response["matches"])
+    elapsed = time.perf_counter() - start
+
+    events = args.batch_size * args.batches
+    print(
+        f"matched {events} events in {elapsed:.3f}s "
+        f"({events / elapsed:,.0f} events/s, {args.batches / elapsed:,.0f} batches/s, "
+        f"{matched} trigger hits)"
+    )
+
+
+if __name__ == "__main__":
+    main()
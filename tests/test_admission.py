@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.api.routes import orders
+from app.core import admission
+from app.core.admission import AdmissionController, InMemoryRateLimitStore, caller_identity
+from app.main import app
+
+
+def make_request(body: bytes, headers=()):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "client": ("10.0.0.1", 1234),
+    }
+    return Request(scope, receive)
+
+
+class UntouchableTable:
+    def __getattr__(self, name):
+        raise AssertionError(f"table accessed: {name}")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(admission, "_store", InMemoryRateLimitStore())
+    monkeypatch.setattr(orders, "orders_table", UntouchableTable())
+    monkeypatch.setattr(orders, "order_stats_table", UntouchableTable())
+    return TestClient(app)
+
+
+def test_bucket_allows_burst_then_refills():
+    store = InMemoryRateLimitStore()
+    assert all(store.consume("k", rate=1000, burst=3) == 0 for _ in range(3))
+    wait = store.consume("k", rate=1000, burst=3)
+    assert 0 < wait <= 0.001
+    assert store.consume("other", rate=1000, burst=3) == 0
+
+
+def test_identity_is_the_written_wallet_not_headers():
+    headers = [("X-Wallet-Public-Key", "rotated"), ("X-Telegram-Username", "rotated")]
+    request = make_request(json.dumps({"user_id": "wallet"}).encode(), headers)
+    assert asyncio.run(caller_identity(request)) == "wallet:wallet"
+    assert asyncio.run(caller_identity(make_request(b"not json"))) == "ip:10.0.0.1"
+
+
+def test_rotating_headers_does_not_escape_the_limit(client):
+    statuses = [
+        client.post(
+            "/orders/",
+            content=json.dumps({"user_id": "wallet"}),
+            headers={"X-Wallet-Public-Key": f"w{i}", "Content-Type": "application/json"},
+        ).status_code
+        for i in range(admission.RATE_LIMIT_BURST + 2)
+    ]
+    assert 429 in statuses
+
+
+def test_requests_are_rejected_before_validation_and_table_access(client):
+    # Invalid orders: 422 while tokens remain, 429 once they run out
+    statuses = [
+        client.post("/orders/", json={"user_id": "wallet"}).status_code
+        for _ in range(admission.RATE_LIMIT_BURST + 1)
+    ]
+    assert statuses[: admission.RATE_LIMIT_BURST] == [422] * admission.RATE_LIMIT_BURST
+    response = client.post("/orders/", json={"user_id": "wallet"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_concurrency_cap_rejects_and_releases():
+    controller = AdmissionController(
+        "test", rate=1000, burst=1000, max_concurrency=1, store=InMemoryRateLimitStore()
+    )
+    body = json.dumps({"user_id": "wallet"}).encode()
+
+    async def scenario():
+        first = controller(make_request(body))
+        await first.__anext__()
+        with pytest.raises(HTTPException) as exc:
+            await controller(make_request(body)).__anext__()
+        assert exc.value.status_code == 503
+        await first.aclose()
+        assert controller.in_flight == 0
+        await controller(make_request(body)).__anext__()
+
+    asyncio.run(scenario())
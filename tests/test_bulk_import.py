@@ -0,0 +1,61 @@
+import argparse
+from decimal import Decimal
+
+from app.core import payloads
+from app.tools.bulk_import import SPECS, Stats, read_batches, run
+
+
+def action_line(action_id, amount):
+    # Written by hand so the amount keeps its exact digits
+    return (
+        f'{{"action_id": {action_id}, "action_type_id": 1, "user_id": "wallet", '
+        f'"payload": {{"amount": {amount}, "memo": "{"x" * 32}"}}}}'
+    )
+
+
+def test_decimal_payloads_import_and_invalid_lines_are_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(payloads, "PAYLOAD_COMPRESSION_THRESHOLD", "1")
+    path = tmp_path / "actions.jsonl"
+    path.write_text(
+        "\n".join(
+            [
+                action_line(0, "1.5"),
+                action_line(1, "0.10000000000000000000001"),
+                action_line(2, "2"),
+                '{"action_id": 3, "user_id": "wallet"}',
+            ]
+        )
+        + "\n"
+    )
+    stats = Stats()
+    batches = list(read_batches(str(path), SPECS["actions"], 0, stats))
+    assert stats.rejected == 1
+    first, next_line, items = batches[0]
+    assert (first, next_line) == (0, 4)
+    assert [item["action_id"] for item in items] == [0, 1, 2]
+    assert payloads.decode_payload(items[0]["payload"])["amount"] == 1.5
+    # Too precise for JSON, so stored as an exact map instead
+    assert items[1]["payload"]["amount"] == Decimal("0.10000000000000000000001")
+
+
+def run_args(path, **overrides):
+    args = dict(
+        model="actions",
+        file=str(path),
+        table=None,
+        wcu=100,
+        workers=1,
+        checkpoint=None,
+        progress_interval=60,
+        max_rejects=0,
+        skip_stats_rebuild=False,
+    )
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def test_rejected_lines_fail_the_import(tmp_path):
+    path = tmp_path / "actions.jsonl"
+    path.write_text('{"action_id": 3, "user_id": "wallet"}\n')
+    assert run(run_args(path)) == 2
+    assert run(run_args(path, max_rejects=1)) == 0
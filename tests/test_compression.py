@@ -0,0 +1,106 @@
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate
+
+BODY = "compressible " * 200
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("gzip;q=0.2, br;q=0.8", "br"),
+        ("gzip;level=1;q=0", None),
+        ("gzip;Q=0", None),
+        ("gzip; q = 0", None),
+        ("*;q=0", None),
+        ("*", "br"),
+        ("identity", None),
+        ("gzip;q=bogus", None),
+        ("", None),
+    ],
+)
+def test_negotiate(header, expected):
+    assert negotiate(header, ["br", "gzip"]) == expected
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/no-transform")
+    def no_transform():
+        return PlainTextResponse(BODY, headers={"Cache-Control": "no-transform"})
+
+    @app.get("/stream")
+    def stream():
+        def chunks():
+            for i in range(5):
+                yield f"chunk {i} " * 50
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: 1\n\n"] * 200), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+
+@pytest.fixture
+def client():
+    return make_client()
+
+
+def raw_get(client, path, accept="gzip"):
+    # Ask for the undecoded body so the encoding itself is checked
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_large_response_is_compressed(client):
+    response, body = raw_get(client, "/large")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) == len(body)
+    assert gzip.decompress(body).decode() == BODY
+
+
+def test_refused_encoding_is_not_used(client):
+    response, body = raw_get(client, "/large", accept="gzip;Q=0")
+    assert "content-encoding" not in response.headers
+    assert body.decode() == BODY
+
+
+@pytest.mark.parametrize("path", ["/small", "/no-transform", "/events"])
+def test_passthrough(client, path):
+    response, body = raw_get(client, path)
+    assert "content-encoding" not in response.headers
+    assert body
+
+
+def test_stream_is_compressed_incrementally(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        text = ""
+        for chunk in response.iter_raw():
+            # Every chunk is flushed, so it decodes without later data
+            text += decoder.decompress(chunk).decode()
+    assert text == "".join(f"chunk {i} " * 50 for i in range(5))
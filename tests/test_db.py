@@ -0,0 +1,9 @@
+from app.core.db import dynamodb_config
+from app.core.resilience import REQUEST_TIMEOUT_SECONDS
+
+
+def test_attempts_cannot_outlive_the_request_budget():
+    config = dynamodb_config()
+    assert config.connect_timeout <= REQUEST_TIMEOUT_SECONDS
+    assert config.read_timeout <= REQUEST_TIMEOUT_SECONDS
+    assert config.retries["total_max_attempts"] == 1
@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core import idempotency
+from app.core.idempotency import DynamoDBIdempotencyStore, run_idempotent
+from app.core.resilience import DynamoDBUnavailable
+
+
+class ThrottledWritesTable:
+    """Accepts claims but is throttled for every later write."""
+
+    def put_item(self, **kwargs):
+        return {}
+
+    def update_item(self, **kwargs):
+        raise DynamoDBUnavailable("DynamoDB table idempotency_keys is overloaded")
+
+    def delete_item(self, **kwargs):
+        raise DynamoDBUnavailable("DynamoDB table idempotency_keys is overloaded")
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = DynamoDBIdempotencyStore()
+    store.table = ThrottledWritesTable()
+    monkeypatch.setattr(idempotency, "_store", store)
+    return store
+
+
+def test_throttled_complete_still_returns_the_result(store):
+    assert run_idempotent("actions", "key", {"a": 1}, lambda: {"ok": True}) == {"ok": True}
+
+
+def test_throttled_release_keeps_the_original_error(store):
+    def handler():
+        raise HTTPException(status_code=500, detail="boom")
+
+    with pytest.raises(HTTPException) as exc:
+        run_idempotent("actions", "key", {"a": 1}, handler)
+    assert exc.value.status_code == 500
+
+
+class ThrottledCompleteTable(ThrottledWritesTable):
+    """Only the completing update is throttled; the claim can be freed."""
+
+    def __init__(self):
+        self.deleted = []
+
+    def delete_item(self, Key, **kwargs):
+        self.deleted.append(Key["idempotency_key"])
+
+
+def test_failed_complete_frees_the_claim(store):
+    store.table = ThrottledCompleteTable()
+    run_idempotent("actions", "key", {"a": 1}, lambda: {"ok": True})
+    assert store.table.deleted == ["actions:key"]
@@ -0,0 +1,61 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import notifications
+from app.api.routes.notifications import encode_cursor
+from app.main import app
+
+
+class FakeNotificationsTable:
+    def __init__(self):
+        self.queries = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        return {"Items": []}
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeNotificationsTable()
+    monkeypatch.setattr(notifications, "notifications_table", table)
+    return table
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+VALID_KEY = {"notification_id": 7, "user_id": "wallet", "timestamp": "2024-01-01T00:00:00"}
+
+
+def test_valid_cursor_is_passed_to_query(table):
+    response = TestClient(app).get(
+        "/notifications/", params={"user_id": "wallet", "cursor": encode_cursor(VALID_KEY)}
+    )
+    assert response.status_code == 200
+    assert table.queries[0]["ExclusiveStartKey"] == VALID_KEY
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        raw_cursor([1, 2]),
+        raw_cursor({"notification_id": 7}),
+        raw_cursor({**VALID_KEY, "extra": 1}),
+        raw_cursor({**VALID_KEY, "notification_id": 7.5}),
+        raw_cursor({**VALID_KEY, "notification_id": True}),
+        raw_cursor({**VALID_KEY, "timestamp": 1}),
+        raw_cursor({**VALID_KEY, "user_id": "someone-else"}),
+    ],
+)
+def test_tampered_cursor_is_rejected(table, cursor):
+    response = TestClient(app).get(
+        "/notifications/", params={"user_id": "wallet", "cursor": cursor}
+    )
+    assert response.status_code == 400
+    assert table.queries == []
@@ -0,0 +1,142 @@
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import orders
+from app.core import admission
+from app.core.admission import InMemoryRateLimitStore
+from app.core.resilience import DynamoDBUnavailable
+from app.main import app
+from app.tools import rebuild_order_stats
+
+
+class FakeOrdersTable:
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, Item, ReturnValues=None):
+        old = self.items.get(Item["order_id"])
+        self.items[Item["order_id"]] = Item
+        return {"Attributes": old} if old else {}
+
+    def delete_item(self, Key, ReturnValues=None):
+        old = self.items.pop(Key["order_id"], None)
+        return {"Attributes": old} if old else {}
+
+    def scan(self, **kwargs):
+        return {"Items": list(self.items.values())}
+
+
+class FakeStatsTable:
+    def __init__(self, throttled=False):
+        self.throttled = throttled
+        self.items = {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        if self.throttled:
+            raise DynamoDBUnavailable("DynamoDB table order_stats is overloaded")
+        item = self.items.setdefault(Key["user_id"], {"user_id": Key["user_id"]})
+        for addition in UpdateExpression[len("ADD "):].split(", "):
+            name, value = addition.split(" ")
+            attribute = ExpressionAttributeNames[name]
+            item[attribute] = item.get(attribute, 0) + ExpressionAttributeValues[value]
+
+    def get_item(self, Key):
+        item = self.items.get(Key["user_id"])
+        return {"Item": item} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item["user_id"]] = Item
+
+    def delete_item(self, Key):
+        self.items.pop(Key["user_id"], None)
+
+    def scan(self, **kwargs):
+        return {"Items": list(self.items.values())}
+
+
+class FakeUsersTable:
+    def get_item(self, Key, **kwargs):
+        if Key["wallet_public_key"] == "alice-wallet":
+            return {"Item": {"telegram_username": "alice"}}
+        return {}
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    orders_table, stats_table = FakeOrdersTable(), FakeStatsTable()
+    monkeypatch.setattr(orders, "orders_table", orders_table)
+    monkeypatch.setattr(orders, "order_stats_table", stats_table)
+    monkeypatch.setattr(orders, "users_table", FakeUsersTable())
+    monkeypatch.setattr(admission, "_store", InMemoryRateLimitStore())
+    return orders_table, stats_table
+
+
+def order(order_id, amount, currency="TON", requestee=None):
+    details = {"amount": amount, "currency": currency}
+    if requestee:
+        details["telegram_username"] = requestee
+    return {
+        "order_id": order_id,
+        "app": "TON",
+        "user_id": "wallet",
+        "action_event": {"event_type": "transfer", "details": details},
+    }
+
+
+def test_stats_sum_amounts_exactly(tables):
+    client = TestClient(app)
+    for i in range(3):
+        assert client.post("/orders/", json=order(f"o{i}", "0.1")).status_code == 200
+    response = client.get("/orders/stats/wallet")
+    assert response.json()["currencies"] == {"TON": {"count": 3, "amount": "0.3"}}
+
+
+def test_throttled_stats_update_does_not_fail_the_order(tables):
+    orders_table, stats_table = tables
+    stats_table.throttled = True
+    response = TestClient(app).post("/orders/", json=order("o1", "1"))
+    assert response.status_code == 200
+    assert "o1" in orders_table.items
+
+
+def test_requested_orders_count_as_received_for_the_requestee(tables):
+    client = TestClient(app)
+    client.post("/orders/", json=order("o1", "5", requestee="alice"))
+    client.post("/orders/", json=order("o2", "2", requestee="alice"))
+    client.delete("/orders/o2")
+    stats = client.get("/orders/stats/alice-wallet").json()
+    assert stats["currencies"] == {}
+    assert stats["received"] == {"TON": {"count": 1, "amount": "5"}}
+    sender = client.get("/orders/stats/wallet").json()
+    assert sender["currencies"] == {"TON": {"count": 1, "amount": "5"}}
+    assert sender["received"] == {}
+
+
+def test_rebuild_recomputes_stats_from_orders(tables, monkeypatch):
+    orders_table, stats_table = tables
+    tables_by_name = {"orders": orders_table, "order_stats": stats_table}
+    monkeypatch.setattr(rebuild_order_stats, "get_table", tables_by_name.__getitem__)
+    client = TestClient(app)
+    client.post("/orders/", json=order("o1", "1.5", requestee="alice"))
+    client.post("/orders/", json=order("o2", "2", currency="USDC"))
+    # Drift: a lost update and a stats item with no orders left
+    stats_table.items["wallet"]["count:TON"] = 7
+    stats_table.items["gone"] = {"user_id": "gone", "count:TON": 1}
+
+    assert rebuild_order_stats.rebuild_order_stats() == 2
+    assert stats_table.items == {
+        "wallet": {
+            "user_id": "wallet",
+            "count:TON": 1,
+            "amount:TON": Decimal("1.5"),
+            "count:USDC": 1,
+            "amount:USDC": Decimal("2"),
+        },
+        "telegram:alice": {
+            "user_id": "telegram:alice",
+            "count:TON": 1,
+            "amount:TON": Decimal("1.5"),
+        },
+    }
@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import orders
+from app.core import admission, idempotency
+from app.core.admission import InMemoryRateLimitStore
+from app.core.idempotency import InMemoryIdempotencyStore
+from app.core.resilience import DynamoDBUnavailable
+from app.main import app
+
+
+class FlakyUsersTable:
+    def __init__(self):
+        self.available = False
+
+    def query(self, **kwargs):
+        if not self.available:
+            raise DynamoDBUnavailable("DynamoDB table users is unavailable", retry_after=2)
+        return {"Items": [{"telegram_username": "alice"}]}
+
+
+class FakeTable:
+    def put_item(self, **kwargs):
+        return {}
+
+    def update_item(self, **kwargs):
+        return {}
+
+
+@pytest.fixture
+def users(monkeypatch):
+    users = FlakyUsersTable()
+    monkeypatch.setattr(orders, "users_table", users)
+    monkeypatch.setattr(orders, "orders_table", FakeTable())
+    monkeypatch.setattr(orders, "order_stats_table", FakeTable())
+    monkeypatch.setattr(idempotency, "_store", InMemoryIdempotencyStore())
+    monkeypatch.setattr(admission, "_store", InMemoryRateLimitStore())
+    return users
+
+
+USDC_ORDER = {
+    "order_id": "o1",
+    "app": "USDC",
+    "user_id": "wallet",
+    "action_event": {
+        "event_type": "request",
+        "details": {"telegram_username": "alice", "amount": 5, "currency": "USDC"},
+    },
+}
+
+
+def test_unavailable_requestee_lookup_is_a_retryable_503(users):
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "k1"}
+    response = client.post("/orders/", json=USDC_ORDER, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+
+    users.available = True
+    response = client.post("/orders/", json=USDC_ORDER, headers=headers)
+    assert response.status_code == 200
@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+import pytest
+
+from app.core.payloads import decode_payload, encode_payload, is_encoded
+
+
+def test_small_payloads_stay_maps():
+    payload = {"amount": Decimal("1.5")}
+    assert encode_payload(payload, threshold=1024) is payload
+
+
+def test_decimal_payload_round_trips():
+    payload = {"amount": Decimal("1.5"), "count": Decimal("3"), "note": "x" * 64}
+    stored = encode_payload(payload, threshold=1)
+    assert is_encoded(stored)
+    assert decode_payload(stored) == {"amount": 1.5, "count": 3, "note": "x" * 64}
+
+
+@pytest.mark.parametrize("value", ["0.10000000000000000000001", "NaN", "Infinity"])
+def test_decimals_json_cannot_hold_exactly_stay_maps(value):
+    payload = {"amount": Decimal(value), "note": "x" * 64}
+    assert encode_payload(payload, threshold=1) is payload
+
+
+def test_unsupported_types_still_fail():
+    with pytest.raises(TypeError):
+        encode_payload({"when": object()}, threshold=1)
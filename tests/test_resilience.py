@@ -0,0 +1,161 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core import resilience
+from app.core.resilience import (
+    CircuitBreaker,
+    DynamoDBUnavailable,
+    RetryQuota,
+    call_dynamodb,
+    reset_request_deadline,
+    set_request_deadline,
+)
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "PutItem")
+
+
+class FlakyOperation:
+    """Raises the queued errors in order, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_quotas", {})
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+def use_breaker(name, **kwargs):
+    breaker = CircuitBreaker(**kwargs)
+    resilience._breakers[name] = breaker
+    return breaker
+
+
+def open_breaker(name, **kwargs):
+    breaker = use_breaker(name, failure_threshold=1, **kwargs)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    return breaker
+
+
+def test_retries_throttling_until_success():
+    operation = FlakyOperation(
+        client_error("ProvisionedThroughputExceededException"),
+        client_error("ProvisionedThroughputExceededException"),
+    )
+    assert call_dynamodb("t", operation) == "ok"
+    assert operation.calls == 3
+
+
+def test_non_retryable_error_is_raised_and_counts_as_success():
+    breaker = use_breaker("t", failure_threshold=1)
+    operation = FlakyOperation(client_error("ConditionalCheckFailedException"))
+    with pytest.raises(ClientError):
+        call_dynamodb("t", operation)
+    assert operation.calls == 1
+    assert breaker.state == "closed"
+
+
+def test_breaker_opens_after_exhausted_retries_and_rejects_calls():
+    use_breaker("t", failure_threshold=1, reset_timeout=60)
+    failing = FlakyOperation(*[client_error("InternalServerError")] * 10)
+    with pytest.raises(DynamoDBUnavailable):
+        call_dynamodb("t", failing)
+    operation = FlakyOperation()
+    with pytest.raises(DynamoDBUnavailable) as exc:
+        call_dynamodb("t", operation)
+    assert operation.calls == 0
+    assert exc.value.retry_after >= 1.0
+
+
+def test_flaky_probe_retries_and_closes_breaker():
+    breaker = open_breaker("t", reset_timeout=0)
+    operation = FlakyOperation(client_error("ThrottlingException"))
+    assert call_dynamodb("t", operation) == "ok"
+    assert operation.calls == 2
+    assert breaker.state == "closed"
+    assert call_dynamodb("t", FlakyOperation()) == "ok"
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = open_breaker("t", reset_timeout=0)
+    with pytest.raises(DynamoDBUnavailable):
+        call_dynamodb("t", FlakyOperation(*[client_error("InternalServerError")] * 10))
+    assert breaker.state == "open"
+    assert not breaker._probing
+
+
+def test_concurrent_callers_are_rejected_while_probing():
+    breaker = open_breaker("t", reset_timeout=0)
+    breaker.before_call("t")
+    with pytest.raises(DynamoDBUnavailable):
+        call_dynamodb("t", FlakyOperation())
+
+
+@pytest.mark.parametrize("error", [TypeError("Float types are not supported"), ValueError("bad")])
+def test_probe_failing_before_the_table_is_released(error):
+    breaker = open_breaker("t", reset_timeout=0)
+    with pytest.raises(type(error)):
+        call_dynamodb("t", FlakyOperation(error))
+    assert breaker.state == "half_open"
+    assert not breaker._probing
+    assert call_dynamodb("t", FlakyOperation()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_expired_deadline_fails_before_calling():
+    token = set_request_deadline(0)
+    try:
+        operation = FlakyOperation()
+        with pytest.raises(DynamoDBUnavailable):
+            call_dynamodb("t", operation)
+    finally:
+        reset_request_deadline(token)
+    assert operation.calls == 0
+
+
+def test_deadline_stops_retries(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    token = set_request_deadline(0.01)
+    try:
+        operation = FlakyOperation(*[client_error("ThrottlingException")] * 10)
+        with pytest.raises(DynamoDBUnavailable):
+            call_dynamodb("t", operation)
+    finally:
+        reset_request_deadline(token)
+    assert operation.calls == 1
+
+
+def test_deadline_is_scoped_to_the_request():
+    token = set_request_deadline(5)
+    assert 0 < resilience.remaining_time() <= 5
+    reset_request_deadline(token)
+    assert resilience.remaining_time() is None
+
+
+def test_retry_quota_spends_and_refunds():
+    quota = RetryQuota(capacity=10)
+    assert quota.acquire(6)
+    assert not quota.acquire(6)
+    quota.refund(20)
+    assert quota.tokens == 10
+
+
+def test_exhausted_quota_stops_retries():
+    resilience._quotas["t"] = RetryQuota(capacity=0)
+    operation = FlakyOperation(client_error("ThrottlingException"))
+    with pytest.raises(DynamoDBUnavailable):
+        call_dynamodb("t", operation)
+    assert operation.calls == 1
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from app.core.trigger_index import TriggerIndex
+
+
+class BlockingLoader:
+    """Loader whose scans can be held open to simulate a slow table."""
+
+    def __init__(self, triggers):
+        self.triggers = triggers
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return list(self.triggers)
+
+
+def stale(index):
+    index._loaded_at -= index.ttl + 1
+
+
+def test_matches_by_event_type():
+    index = TriggerIndex(lambda: [(1, "deposit"), (2, "deposit"), (3, "swap")])
+    assert index.match(["deposit", "swap", "other"]) == [(1, 2), (3,), ()]
+
+
+def test_stale_index_is_served_while_one_caller_reloads():
+    loader = BlockingLoader([(1, "deposit")])
+    index = TriggerIndex(loader)
+    index.ensure_loaded()
+    stale(index)
+    loader.triggers = [(1, "deposit"), (2, "deposit")]
+    loader.release.clear()
+    loader.started.clear()
+
+    reloader = threading.Thread(target=index.ensure_loaded)
+    reloader.start()
+    assert loader.started.wait(5)
+    # Other callers neither block nor start a second scan
+    assert index.match(["deposit"]) == [(1,)]
+    assert loader.calls == 2
+
+    loader.release.set()
+    reloader.join(5)
+    assert index.match(["deposit"]) == [(1, 2)]
+
+
+def test_writes_during_a_reload_are_kept():
+    loader = BlockingLoader([(1, "deposit"), (2, "deposit")])
+    index = TriggerIndex(loader)
+    index.ensure_loaded()
+    stale(index)
+    loader.release.clear()
+    loader.started.clear()
+
+    reloader = threading.Thread(target=index.ensure_loaded)
+    reloader.start()
+    assert loader.started.wait(5)
+    index.add(3, "deposit")
+    index.remove(1, "deposit")
+    loader.release.set()
+    reloader.join(5)
+    assert index.match(["deposit"]) == [(2, 3)]
+
+
+def test_failed_first_load_raises():
+    def loader():
+        raise RuntimeError("scan failed")
+
+    with pytest.raises(RuntimeError):
+        TriggerIndex(loader).match(["deposit"])
+
+
+def test_failed_reload_keeps_the_old_index():
+    triggers = [(1, "deposit")]
+
+    def loader():
+        if not triggers:
+            raise RuntimeError("scan failed")
+        return triggers
+
+    index = TriggerIndex(loader)
+    index.ensure_loaded()
+    stale(index)
+    triggers.clear()
+    assert index.match(["deposit"]) == [(1,)]
+    index.add(2, "deposit")
+    assert index._pending is None